@@ -14,34 +14,53 @@ __author__ = 'wesc+api@google.com (Stanley Calixte)'
 
 
 from datetime import datetime
+from datetime import timedelta
 
 import argparse as argparse
+import collections
+import hashlib
+import heapq
 import logging
+import operator
+import random
+import re
 import sys
 import os
+import time
 import endpoints
 from protorpc import messages
 from protorpc import message_types
+from protorpc import protojson
 from protorpc import remote
 
 
 from google.appengine.api import memcache
 from google.appengine.api import taskqueue
+from google.appengine.datastore.datastore_query import Cursor
 from google.appengine.ext import ndb
 
 from models import ConflictException
 from models import Profile
+from models import Registration
+from models import WishlistEntry
 from models import ProfileMiniForm
 from models import ProfileForm
-from models import StringMessage
 from models import BooleanMessage
+from models import AnnouncementConferenceForm
+from models import AnnouncementForm
 from models import Conference
 from models import ConferenceForm
 from models import ConferenceForms
 from models import ConferenceQueryForm
 from models import ConferenceQueryForms
+from models import NearlySoldOut
+from models import SeatShard
+from models import SearchPosting
 from models import TeeShirtSize
 from models import Speaker
+from models import FeaturedSpeaker
+from models import FeaturedSpeakerForm
+from models import FeaturedSpeakerForms
 from models import AddSpeakerForm
 from models import SpeakerForm
 from models import SpeakerForms
@@ -50,7 +69,12 @@ from models import SpeakerQueryForms
 
 from models import Session
 from models import SessionForm
+from models import SessionNameIndex
 from models import SessionForms
+from models import SessionConflictForm
+from models import SessionConflictForms
+from models import SessionImportForms
+from models import SessionImportResultForm
 from models import SessionBySpeakerQueryForm
 from models import SessionBySessionTypeQueryForm
 from models import SessionBySpeakerRoleForm
@@ -64,22 +88,59 @@ from models import SessionQueryForm
 from models import SessionQueryForms
 from models import SessionType
 from models import SessionRole
+from models import calendarYearBuckets
+from models import isoWeekBuckets
+from models import yearMonthBuckets
 
 from settings import WEB_CLIENT_ID
 from settings import ANDROID_CLIENT_ID
 from settings import IOS_CLIENT_ID
 from settings import ANDROID_AUDIENCE
+from settings import CONFERENCE_CACHE_TTL
+from settings import SEAT_SHARD_COUNT
+from settings import SEATS_CACHE_TTL
+from settings import SEAT_SYNC_DELAY
+from settings import FEATURED_SPEAKER_DELAY
 
 from utils import getUserId
+from utils import RequestContext
+from utils import clearRequestContext
 
 
 EMAIL_SCOPE = endpoints.EMAIL_SCOPE
 API_EXPLORER_CLIENT_ID = endpoints.API_EXPLORER_CLIENT_ID
-MEMCACHE_ANNOUNCEMENTS_KEY = "RECENT_ANNOUNCEMENTS"
-MEMCACHE_FEATURED_SPEAKER_KEY = "FEATURED_SPEAKER"
+# holds a dict; the old RECENT_ANNOUNCEMENTS key held a plain string
+MEMCACHE_ANNOUNCEMENTS_KEY = "ANNOUNCEMENT"
+MEMCACHE_FEATURED_SPEAKER_KEY = "FEATURED_SPEAKER:%s"
+MEMCACHE_LATEST_FEATURED_SPEAKER_KEY = "FEATURED_SPEAKER"
+MEMCACHE_CONFERENCE_KEY = "CONFERENCE:%s"
+MEMCACHE_STATS_KEY = "STATS:%s"
+MEMCACHE_SEATS_KEY = "SEATS:%s"
+MEMCACHE_SEARCH_KEY = "SEARCH:%s"
 ANNOUNCEMENT_TPL = ('Last chance to attend! The following conferences '
                     'are nearly sold out: %s')
 SPEAKER_TPL = ('Welcoming %s, to many more sessions: %s!')
+MAX_PAGE_SIZE = 1000
+NEARLY_SOLD_OUT_SEATS = 5
+NEARLY_SOLD_OUT_ID = 'conferences'
+ANNOUNCEMENT_MAX_CONFERENCES = 20
+ANNOUNCEMENT_ETAG_TPL = '"%d"'
+EVENING_START_MINUTE = 19 * 60  # 7 PM
+BACKFILL_BATCH_SIZE = 100
+EXPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 500
+SPEAKER_UPSERT_CHUNK_SIZE = 25  # entity groups per cross-group transaction
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+SEARCH_MAX_TOKENS = 200  # postings kept per entity, most frequent first
+SEARCH_POSTINGS_BATCH = 1000  # postings read per query token and page
+SEARCH_MAX_POSTINGS = 2000  # postings scanned per query token
+SEARCH_PREFIX_MIN_LENGTH = 3  # shorter query words match whole words only
+SEARCH_MAX_QUERY_TOKENS = 10
+SEARCH_CACHE_TTL = 300  # seconds ranked results are kept for paging
+SEARCH_PAGE_SIZE = 20
+FEATURED_SPEAKER_QUEUE = 'featured-speakers'
+FEATURED_SPEAKER_LEASE = 60  # seconds
+FEATURED_SPEAKER_LEASE_SIZE = 1000
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
 DEFAULTS = {
@@ -103,8 +164,105 @@ FIELDS = {
             'TOPIC': 'topics',
             'MONTH': 'month',
             'MAX_ATTENDEES': 'maxAttendees',
+            'START_DATE': 'startDate',
+            'END_DATE': 'endDate',
 }
 
+# filtered in memory, after narrowing the query to the date buckets
+CONFERENCE_DATE_FIELDS = ('startDate', 'endDate')
+# most months a date range may span to be queried as monthBuckets IN
+DATE_BUCKET_MAX_MONTHS = 12
+# most years a date range may span to be queried as yearBuckets IN
+DATE_BUCKET_MAX_YEARS = 10
+
+SESSION_FIELDS = {
+    'NAME': 'sessionName',
+    'SPEAKER': 'speaker',
+    'TYPE': 'typeOfSession',
+    'ROLE': 'role',
+    'LOCATION': 'location',
+    'DATE': 'date',
+    'START_TIME': 'startTime',
+    'DURATION': 'duration',
+}
+
+# session equality filters the query planner can run in the datastore,
+# most selective first; each has an ancestor index in index.yaml
+SESSION_EQUALITY_PREFERENCE = (
+    'sessionName',
+    'speaker',
+    'date',
+    'location',
+    'typeOfSession',
+    'role',
+    'isWorkshop',
+)
+
+# session fields an inequality filter can be run in the datastore on
+SESSION_RANGE_FIELDS = ('startTime', 'duration')
+
+COMPARATORS = {
+    '=': operator.eq,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '!=': operator.ne,
+}
+
+
+def _formFields(form_class, model_class, converters):
+    """Return the (name, converter) pairs of the form_class fields that
+    are filled from a model_class entity, in form field order.
+
+    Computed once at import so entity to form copies skip all_fields()
+    and hasattr(); converter is None for values copied as is.
+    """
+    return [(field.name, converters.get(field.name))
+            for field in form_class.all_fields()
+            if hasattr(model_class, field.name)]
+
+CONFERENCE_FORM_FIELDS = _formFields(ConferenceForm, Conference, {
+    # convert Date to date string
+    'startDate': str,
+    'endDate': str,
+})
+PROFILE_FORM_FIELDS = _formFields(ProfileForm, Profile, {
+    # convert t-shirt string to Enum
+    'teeShirtSize': lambda value: getattr(TeeShirtSize, value),
+})
+SESSION_FORM_FIELDS = _formFields(SessionForm, Session, {
+    'typeOfSession': lambda value: getattr(SessionType, value),
+    'role': lambda value: getattr(SessionRole, value),
+    'date': str,
+    'startTime': str,
+})
+
+# "summary" list responses only carry required properties, which every
+# entity has, so projection queries on them skip no entity
+CONFERENCE_SUMMARY_PROJECTION = [Conference.name]
+CONFERENCE_SUMMARY_FIELDS = [(name, convert) for name, convert
+                             in CONFERENCE_FORM_FIELDS if name == 'name']
+SESSION_SUMMARY_PROJECTION = [Session.sessionName, Session.speaker]
+SESSION_SUMMARY_FIELDS = [(name, convert) for name, convert
+                          in SESSION_FORM_FIELDS
+                          if name in ('sessionName', 'speaker')]
+
+# searchable properties and their weight
+CONFERENCE_SEARCH_FIELDS = (
+    ('name', 3),
+    ('description', 1),
+    ('city', 1),
+    ('topics', 1),
+)
+SESSION_SEARCH_FIELDS = (
+    ('sessionName', 3),
+    ('speaker', 2),
+    ('highlights', 1),
+    ('location', 1),
+    ('typeOfSession', 1),
+)
+
 CONF_GET_REQUEST = endpoints.ResourceContainer(
     message_types.VoidMessage,
     websafeConferenceKey=messages.StringField(1),
@@ -118,6 +276,9 @@ CONF_POST_REQUEST = endpoints.ResourceContainer(
 SESSION_GET_REQUEST = endpoints.ResourceContainer(
     message_types.VoidMessage,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_POST_REQUEST = endpoints.ResourceContainer(
@@ -144,40 +305,124 @@ SESSION_CONFERENCE_GET_WISHLIST_REQUEST = endpoints.ResourceContainer(
 SESSION_TYPE_POST_REQUEST = endpoints.ResourceContainer(
     SessionBySessionTypeQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_SPEAKER_ROLE_POST_REQUEST = endpoints.ResourceContainer(
     SessionBySpeakerRoleForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_LOCATION_POST_REQUEST = endpoints.ResourceContainer(
     SessionByLocationQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_DATE_POST_REQUEST = endpoints.ResourceContainer(
     SessionByDateQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_LOCATION_TYPE_POST_REQUEST = endpoints.ResourceContainer(
     SessionLocationTypeOfSessionQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 
 SESSION_LOCATION_TYPE_DATE_POST_REQUEST = endpoints.ResourceContainer(
     SessionLocationTypeOfSessionDateQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
+)
+
+SESSION_IMPORT_POST_REQUEST = endpoints.ResourceContainer(
+    SessionImportForms,
+    websafeConferenceKey=messages.StringField(1),
+)
+
+SESSION_QUERY_POST_REQUEST = endpoints.ResourceContainer(
+    SessionQueryForms,
+    websafeConferenceKey=messages.StringField(1),
+)
+
+ANNOUNCEMENT_GET_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    ifNoneMatch=messages.StringField(1),
+)
+
+CONF_SEARCH_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    query=messages.StringField(1, required=True),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+)
+
+SESSION_SEARCH_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    query=messages.StringField(1, required=True),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    websafeConferenceKey=messages.StringField(4),
 )
 
 SPEAKER_GET_REQUEST = endpoints.ResourceContainer(
     message_types.VoidMessage,
+    websafeConferenceKey=messages.StringField(1),
+)
+
+FEATURED_SPEAKERS_GET_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    websafeConferenceKey=messages.StringField(1, repeated=True),
+)
+
+SPEAKER_LIST_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    pageSize=messages.IntegerField(1, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(2),
+)
+
+SPEAKER_SESSIONS_POST_REQUEST = endpoints.ResourceContainer(
+    SessionBySpeakerQueryForm,
+    pageSize=messages.IntegerField(1, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(2),
+    summary=messages.BooleanField(3),
+)
+
+CONF_LIST_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    pageSize=messages.IntegerField(1, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(2),
+    summary=messages.BooleanField(3),
+)
+
+SESSION_LIST_REQUEST = endpoints.ResourceContainer(
+    message_types.VoidMessage,
+    pageSize=messages.IntegerField(1, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(2),
+    websafeConferenceKey=messages.StringField(3),
 )
 
 SPEAKER_IN_SESSION_POST_REQUEST = endpoints.ResourceContainer(
     SessionBySpeakerQueryForm,
     websafeConferenceKey=messages.StringField(1),
+    pageSize=messages.IntegerField(2, variant=messages.Variant.INT32),
+    pageToken=messages.StringField(3),
+    summary=messages.BooleanField(4),
 )
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
@@ -197,18 +442,15 @@ class ConferenceApi(remote.Service):
 
 # - - - Conference objects - - - - - - - - - - - - - - - - -
 
-    def _copyConferenceToForm(self, conf, displayName):
-        """Copy relevant fields from Conference to ConferenceForm."""
+    def _copyConferenceToForm(self, conf, displayName,
+                              fields=CONFERENCE_FORM_FIELDS):
+        """Copy relevant fields from Conference to ConferenceForm; pass
+        CONFERENCE_SUMMARY_FIELDS for projected summary entities."""
         cf = ConferenceForm()
-        for field in cf.all_fields():
-            if hasattr(conf, field.name):
-                # convert Date to date string; just copy others
-                if field.name.endswith('Date'):
-                    setattr(cf, field.name, str(getattr(conf, field.name)))
-                else:
-                    setattr(cf, field.name, getattr(conf, field.name))
-            elif field.name == "websafeConferenceKey":
-                setattr(cf, field.name, conf.key.urlsafe())
+        for name, convert in fields:
+            value = getattr(conf, name)
+            setattr(cf, name, convert(value) if convert else value)
+        cf.websafeConferenceKey = conf.key.urlsafe()
         if displayName:
             setattr(cf, 'organizerDisplayName', displayName)
         cf.check_initialized()
@@ -217,10 +459,7 @@ class ConferenceApi(remote.Service):
     def _createConferenceObject(self, request):
         """Create or update Conference object, returning ConferenceForm/request."""
         # preload necessary data items
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
-        user_id = getUserId(user)
+        user, user_id = self._getCurrentUser()
 
         if not request.name:
             raise endpoints.BadRequestException(
@@ -261,10 +500,15 @@ class ConferenceApi(remote.Service):
         c_key = ndb.Key(Conference, c_id, parent=p_key)
         data['key'] = c_key
         data['organizerUserId'] = request.organizerUserId = user_id
+        data['seatShardCount'] = SEAT_SHARD_COUNT
 
         # create Conference, send email to organizer confirming
         # creation of Conference & return (modified) ConferenceForm
-        Conference(**data).put()
+        conf = Conference(**data)
+        ndb.put_multi([conf] + self._searchPostings(
+            conf, CONFERENCE_SEARCH_FIELDS))
+        self._initSeatShards(c_key, conf.seatsAvailable, conf.seatShardCount)
+        self._updateNearlySoldOut(conf, conf.seatsAvailable)
         taskqueue.add(params={'email': user.email(),
                               'conferenceInfo': repr(request)},
                       url='/tasks/send_confirmation_email'
@@ -273,10 +517,7 @@ class ConferenceApi(remote.Service):
 
     @ndb.transactional()
     def _updateConferenceObject(self, request):
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
-        user_id = getUserId(user)
+        user, user_id = self._getCurrentUser()
 
         # copy ConferenceForm/ProtoRPC Message into dict
         data = {field.name: getattr(request, field.name)
@@ -295,6 +536,9 @@ class ConferenceApi(remote.Service):
             raise endpoints.ForbiddenException(
                 'Only the owner can update the conference.')
 
+        old_postings = set(posting.key for posting in self._searchPostings(
+            conf, CONFERENCE_SEARCH_FIELDS))
+
         # Not getting all the fields, so don't create a new object; just
         # copy relevant fields from ConferenceForm to Conference object
         for field in request.all_fields():
@@ -308,7 +552,10 @@ class ConferenceApi(remote.Service):
                         conf.month = data.month
                 # write to Conference object
                 setattr(conf, field.name, data)
-        conf.put()
+        postings = self._searchPostings(conf, CONFERENCE_SEARCH_FIELDS)
+        ndb.put_multi([conf] + postings)
+        ndb.delete_multi(
+            old_postings - set(posting.key for posting in postings))
         prof = ndb.Key(Profile, user_id).get()
         return self._copyConferenceToForm(conf, getattr(prof, 'displayName'))
 
@@ -323,37 +570,86 @@ class ConferenceApi(remote.Service):
                       http_method='PUT', name='updateConference')
     def updateConference(self, request):
         """Update conference w/provided fields & return w/updated info."""
-        return self._updateConferenceObject(request)
+        cf = self._updateConferenceObject(request)
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        conf = c_key.get()
+        # an explicit seatsAvailable overrides the seat shards
+        if request.seatsAvailable is not None:
+            self._initSeatShards(c_key, request.seatsAvailable,
+                                 conf.seatShardCount)
+            memcache.delete(MEMCACHE_SEATS_KEY % c_key.urlsafe())
+        # invalidate once the transaction has committed
+        self._invalidateConferenceCache(c_key)
+        self._updateNearlySoldOut(conf, self._getSeatsAvailable(conf))
+        return cf
 
     @endpoints.method(CONF_GET_REQUEST, ConferenceForm,
                       path='conference/{websafeConferenceKey}',
                       http_method='GET', name='getConference')
     def getConference(self, request):
         """Return requested conference (by websafeConferenceKey)."""
-        # get Conference object from request; bail if not found
-        conf = ndb.Key(urlsafe=request.websafeConferenceKey).get()
+        # serve from memcache when possible
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        cache_key = MEMCACHE_CONFERENCE_KEY % c_key.urlsafe()
+        cached = memcache.get(cache_key)
+        if cached is not None:
+            self._incrementStat('conference_cache_hit')
+            return protojson.decode_message(ConferenceForm, cached)
+        self._incrementStat('conference_cache_miss')
+
+        # get Conference object from request and its organiser's Profile
+        # (the parent key) concurrently; bail if not found
+        conf_future = c_key.get_async()
+        prof_future = c_key.parent().get_async()
+        conf = conf_future.get_result()
         if not conf:
             raise endpoints.NotFoundException(
                 'No conference found with key: %s' %
                 request.websafeConferenceKey)
-        prof = conf.key.parent().get()
+        prof = prof_future.get_result()
+        cf = self._copyConferenceToForm(conf, getattr(prof, 'displayName'))
+        # Conference.seatsAvailable lags the seat shards, report the latter
+        cf.seatsAvailable = self._getSeatsAvailable(conf)
+        memcache.set(cache_key, protojson.encode_message(cf),
+                     time=CONFERENCE_CACHE_TTL)
         # return ConferenceForm
-        return self._copyConferenceToForm(conf, getattr(prof, 'displayName'))
+        return cf
 
-    @endpoints.method(message_types.VoidMessage, ConferenceForms,
+    @staticmethod
+    def _invalidateConferenceCache(*conference_keys):
+        """Drop the cached ConferenceForm of the given Conference keys."""
+        memcache.delete_multi(
+            [MEMCACHE_CONFERENCE_KEY % c_key.urlsafe()
+             for c_key in conference_keys])
+
+    @staticmethod
+    def _incrementStat(name, delta=1):
+        """Bump a named counter kept in memcache, e.g. cache hits."""
+        memcache.incr(MEMCACHE_STATS_KEY % name, delta=delta,
+                      initial_value=0)
+
+    @endpoints.method(CONF_LIST_REQUEST, ConferenceForms,
                       path='getConferencesCreated',
                       http_method='POST', name='getConferencesCreated')
     def getConferencesCreated(self, request):
         """Return conferences created by user."""
         # make sure user is authed
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
-        user_id = getUserId(user)
+        user, user_id = self._getCurrentUser()
 
-        # create ancestor query for all key matches for this user
-        confs = Conference.query(ancestor=ndb.Key(Profile, user_id))
-        prof = ndb.Key(Profile, user_id).get()
+        # create ancestor query for all key matches for this user; the
+        # Profile is fetched while the query runs
+        p_key = ndb.Key(Profile, user_id)
+        prof_future = p_key.get_async()
+        if request.summary:
+            confs, next_token = self._fetchPage(
+                Conference.query(ancestor=p_key), request,
+                projection=CONFERENCE_SUMMARY_PROJECTION)
+            fields = CONFERENCE_SUMMARY_FIELDS
+        else:
+            confs, next_token = self._fetchPage(
+                Conference.query(ancestor=p_key), request)
+            fields = CONFERENCE_FORM_FIELDS
+        prof = prof_future.get_result()
         # return set of ConferenceForm objects per Conference
         return ConferenceForms(
             items=[
@@ -361,12 +657,20 @@ class ConferenceApi(remote.Service):
                     conf,
                     getattr(
                         prof,
-                        'displayName')) for conf in confs])
+                        'displayName'), fields) for conf in confs],
+            nextPageToken=next_token,
+            summary=request.summary)
 
     def _getQuery(self, request):
-        """Return formatted query from the submitted filters."""
+        """Return formatted query from the submitted filters, and the
+        START_DATE/END_DATE filters left to apply in memory."""
         q = Conference.query()
         inequality_filter, filters = self._formatFilters(request.filters)
+        # ndb runs "!=" as a multi-query, which cannot be paged by name
+        if getattr(request, 'pageSize', None) and any(
+                filtr["operator"] == "!=" for filtr in filters):
+            raise endpoints.BadRequestException(
+                "NE filters cannot be combined with 'pageSize'.")
 
         # If exists, sort on inequality filter first
         if not inequality_filter:
@@ -375,13 +679,83 @@ class ConferenceApi(remote.Service):
             q = q.order(ndb.GenericProperty(inequality_filter))
             q = q.order(Conference.name)
 
+        date_filters = []
         for filtr in filters:
+            if filtr["field"] in CONFERENCE_DATE_FIELDS:
+                try:
+                    filtr["value"] = datetime.strptime(
+                        str(filtr["value"])[:10], "%Y-%m-%d").date()
+                except ValueError:
+                    raise endpoints.BadRequestException(
+                        "Invalid value for '%s': %s" % (
+                            filtr["field"], filtr["value"]))
+                date_filters.append(filtr)
+                continue
             if filtr["field"] in ["month", "maxAttendees"]:
                 filtr["value"] = int(filtr["value"])
             formatted_query = ndb.query.FilterNode(
                 filtr["field"], filtr["operator"], filtr["value"])
             q = q.filter(formatted_query)
-        return q
+
+        # IN runs one query per bucket, which cannot be paged with cursors
+        paged = bool(getattr(request, 'pageSize', None))
+        bucket_filter = self._dateBucketFilter(date_filters, allowIn=not paged)
+        if bucket_filter is not None:
+            q = q.filter(bucket_filter)
+        elif date_filters and paged:
+            # paging would scan every conference for mostly empty pages
+            raise endpoints.BadRequestException(
+                "With 'pageSize', START_DATE/END_DATE filters must bound a "
+                "range within one calendar year.")
+        return q, date_filters
+
+    @staticmethod
+    def _dateBucketFilter(date_filters, allowIn=True):
+        """Return an equality filter on the date buckets a conference
+        must share with the range the date filters allow, or None.
+
+        A lower bound on either date means the conference ends on or
+        after it, an upper bound that it starts on or before it. A range
+        within one week, month or year becomes a single equality; with
+        allowIn a longer one becomes monthBuckets IN its months, up to
+        DATE_BUCKET_MAX_MONTHS, or yearBuckets IN its years, up to
+        DATE_BUCKET_MAX_YEARS. Other ranges, including those open at
+        either end, are only filtered in memory.
+        """
+        lower = upper = None
+        for filtr in date_filters:
+            value = filtr["value"]
+            if filtr["operator"] in ('=', '>', '>='):
+                lower = max(lower, value) if lower else value
+            if filtr["operator"] in ('=', '<', '<='):
+                upper = min(upper, value) if upper else value
+        if lower is None or upper is None or lower > upper:
+            return None
+
+        weeks = isoWeekBuckets(lower, upper)
+        if len(weeks) == 1:
+            return Conference.weekBuckets == weeks[0]
+        months = yearMonthBuckets(lower, upper)
+        if len(months) == 1:
+            return Conference.monthBuckets == months[0]
+        if allowIn and len(months) <= DATE_BUCKET_MAX_MONTHS:
+            return Conference.monthBuckets.IN(months)
+        years = calendarYearBuckets(lower, upper)
+        if len(years) == 1:
+            return Conference.yearBuckets == years[0]
+        if allowIn and len(years) <= DATE_BUCKET_MAX_YEARS:
+            return Conference.yearBuckets.IN(years)
+        return None
+
+    @staticmethod
+    def _matchesConferenceFilters(conf, filters):
+        """Return True if conf passes every (in memory) filter."""
+        for filtr in filters:
+            value = getattr(conf, filtr["field"])
+            if value is None or not COMPARATORS[filtr["operator"]](
+                    value, filtr["value"]):
+                return False
+        return True
 
     def _formatFilters(self, filters):
         """Parse, check validity and format user supplied filters."""
@@ -399,8 +773,10 @@ class ConferenceApi(remote.Service):
                 raise endpoints.BadRequestException(
                     "Filter contains invalid field or operator.")
 
-            # Every operation except "=" is an inequality
-            if filtr["operator"] != "=":
+            # Every operation except "=" is an inequality; dates are
+            # compared in memory
+            if (filtr["operator"] != "=" and
+                    filtr["field"] not in CONFERENCE_DATE_FIELDS):
                 # check if inequality operation has been used in previous filters
                 # disallow the filter if inequality was performed on a different field before
                 # track the field on which the inequality operation is
@@ -420,26 +796,105 @@ class ConferenceApi(remote.Service):
                       name='queryConferences')
     def queryConferences(self, request):
         """Query for conferences."""
-        conferences = self._getQuery(request)
+        query, date_filters = self._getQuery(request)
+        if request.summary and not date_filters:
+            # names and keys only, straight from the index
+            conferences, next_token = self._fetchPage(
+                query, request, projection=CONFERENCE_SUMMARY_PROJECTION)
+            return ConferenceForms(
+                items=[self._copyConferenceToForm(
+                    conf, None, CONFERENCE_SUMMARY_FIELDS)
+                    for conf in conferences],
+                nextPageToken=next_token,
+                summary=True)
+
+        # run the query once; the page is buffered for both passes below.
+        # Date filters run after paging, so a page may hold fewer than
+        # pageSize conferences
+        conferences, next_token = self._fetchPage(query, request)
+        conferences = [conf for conf in conferences
+                       if self._matchesConferenceFilters(conf, date_filters)]
+        if request.summary:
+            return ConferenceForms(
+                items=[self._copyConferenceToForm(
+                    conf, None, CONFERENCE_SUMMARY_FIELDS)
+                    for conf in conferences],
+                nextPageToken=next_token,
+                summary=True)
 
         # need to fetch organiser displayName from profiles
-        # get all keys and use get_multi for speed
-        organisers = [(ndb.Key(Profile, conf.organizerUserId))
-                      for conf in conferences]
-        profiles = ndb.get_multi(organisers)
-
-        # put display names in a dict for easier fetching
-        names = {}
-        for profile in profiles:
-            names[profile.key.id()] = profile.displayName
+        names = self._getOrganiserNames(conferences)
 
         # return individual ConferenceForm object per Conference
         return ConferenceForms(
             items=[
                 self._copyConferenceToForm(
-                    conf, names[
-                        conf.organizerUserId]) for conf in conferences])
+                    conf, names.get(
+                        conf.organizerUserId)) for conf in conferences],
+            nextPageToken=next_token)
+
+    def _getOrganiserNames(self, conferences):
+        """Return organiser display names keyed by organizerUserId.
+
+        Each organiser Profile is fetched once in a single get_multi;
+        organisers without a Profile are left out of the result.
+        """
+        user_ids = set(conf.organizerUserId for conf in conferences
+                       if conf.organizerUserId)
+        profiles = ndb.get_multi(
+            [ndb.Key(Profile, user_id) for user_id in user_ids])
+
+        # put display names in a dict for easier fetching
+        return {profile.key.id(): profile.displayName
+                for profile in profiles if profile}
+
+
+    def _keyBatches(self, query):
+        """Yield the keys of query in batches of EXPORT_BATCH_SIZE, one
+        keys-only page at a time."""
+        cursor = None
+        more = True
+        while more:
+            keys, cursor, more = query.fetch_page(
+                EXPORT_BATCH_SIZE, start_cursor=cursor, keys_only=True)
+            if keys:
+                yield keys
+            more = more and cursor
+
+    def _exportConference(self, conf):
+        """Yield conf, its sessions, speakers and attendee count as lines
+        of newline-delimited JSON; used by the conference export handler.
+
+        Sessions and speakers are read EXPORT_BATCH_SIZE keys at a time
+        with get_multi, so only one batch is held in memory.
+        """
+        c_key = conf.key
+        line = '{"type": "%s", "data": %s}\n'
 
+        organiser = c_key.parent().get()
+        yield line % ('conference', protojson.encode_message(
+            self._copyConferenceToForm(
+                conf, getattr(organiser, 'displayName', None))))
+
+        for keys in self._keyBatches(Session.query(ancestor=c_key)):
+            for session in ndb.get_multi(keys):
+                if session:
+                    form = self._copySessionToForm(session)
+                    yield line % ('session', protojson.encode_message(form))
+
+        for keys in self._keyBatches(
+                Speaker.query(Speaker.conference_keys == c_key)):
+            for speaker in ndb.get_multi(keys):
+                if speaker:
+                    # only the speaker's sessions in this conference
+                    form = SpeakerForm(speaker=speaker.name, sessionNames=[
+                        name for key, name in zip(speaker.session_keys,
+                                                  speaker.session_names)
+                        if key.parent() == c_key])
+                    yield line % ('speaker', protojson.encode_message(form))
+
+        attendees = Registration.query(Registration.conference == c_key)
+        yield line % ('attendees', '{"count": %d}' % attendees.count())
 
 # - - - Profile objects - - - - - - - - - - - - - - - - - - -
 
@@ -447,28 +902,48 @@ class ConferenceApi(remote.Service):
         """Copy relevant fields from Profile to ProfileForm."""
         # copy relevant fields from Profile to ProfileForm
         pf = ProfileForm()
-        for field in pf.all_fields():
-            if hasattr(prof, field.name):
-                # convert t-shirt string to Enum; just copy others
-                if field.name == 'teeShirtSize':
-                    setattr(
-                        pf, field.name, getattr(
-                            TeeShirtSize, getattr(
-                                prof, field.name)))
-                else:
-                    setattr(pf, field.name, getattr(prof, field.name))
+        for name, convert in PROFILE_FORM_FIELDS:
+            value = getattr(prof, name)
+            setattr(pf, name, convert(value) if convert else value)
         pf.check_initialized()
         return pf
 
-    def _getProfileFromUser(self):
-        """Return user Profile from datastore, creating new one if non-existent."""
-        # make sure user is authed
+    def _getRequestContext(self):
+        """Return the RequestContext of this request (one per instance)."""
+        context = getattr(self, '_requestContext', None)
+        if context is None:
+            context = self._requestContext = RequestContext().activate()
+        return context
+
+    def _getCurrentUser(self):
+        """Return (user, user_id) of the authorized user, resolving the
+        user_id only once per request.
+        """
         user = endpoints.get_current_user()
         if not user:
             raise endpoints.UnauthorizedException('Authorization required')
 
+        context = self._getRequestContext()
+        if context.user != user:
+            context.user = user
+            context.user_id = getUserId(user)
+            context.profile = None
+        return user, context.user_id
+
+    def _getProfileFromUser(self):
+        """Return user Profile from datastore, creating new one if non-existent."""
+        # make sure user is authed
+        user, user_id = self._getCurrentUser()
+
+        # reuse the Profile already loaded by this request; inside a
+        # transaction always read it fresh, it may be rolled back
+        context = self._getRequestContext()
+        if ndb.in_transaction():
+            context.profile = None
+        elif context.profile is not None:
+            return context.profile
+
         # get Profile from datastore
-        user_id = getUserId(user)
         p_key = ndb.Key(Profile, user_id)
         profile = p_key.get()
         # create new Profile if not there
@@ -481,19 +956,80 @@ class ConferenceApi(remote.Service):
                 sessionWishList=[],
             )
             profile.put()
+        elif profile.conferenceKeysToAttend or profile.sessionWishList:
+            # profile predates Registration/WishlistEntry, move its lists
+            profile = self._migrateProfileLists(p_key)
 
-        if not profile.sessionWishList:
-            profile.sessionWishList = []
-            profile.put()
-
+        if not ndb.in_transaction():
+            context.profile = profile
         return profile      # return Profile
 
+    @staticmethod
+    def _registrationKey(p_key, c_key):
+        """Return the key of the Registration of a Profile for a Conference."""
+        return ndb.Key(Registration, c_key.urlsafe(), parent=p_key)
+
+    @staticmethod
+    def _wishlistKey(p_key, s_key):
+        """Return the key of the WishlistEntry of a Profile for a Session."""
+        return ndb.Key(WishlistEntry, s_key.urlsafe(), parent=p_key)
+
+    @staticmethod
+    @ndb.transactional()
+    def _migrateProfileLists(p_key):
+        """Move a Profile's conferenceKeysToAttend and sessionWishList into
+        Registration and WishlistEntry children; returns the Profile.
+        """
+        profile = p_key.get()
+        if not profile or not (profile.conferenceKeysToAttend or
+                               profile.sessionWishList):
+            return profile
+
+        entities = []
+        for wsck in profile.conferenceKeysToAttend:
+            c_key = ndb.Key(urlsafe=wsck)
+            entities.append(Registration(
+                key=ConferenceApi._registrationKey(p_key, c_key),
+                conference=c_key))
+        for s_key in profile.sessionWishList:
+            entities.append(WishlistEntry(
+                key=ConferenceApi._wishlistKey(p_key, s_key),
+                session=s_key, conference=s_key.parent()))
+        profile.conferenceKeysToAttend = []
+        profile.sessionWishList = []
+        ndb.put_multi(entities + [profile])
+        return profile
+
+    @staticmethod
+    def _migrateProfiles(cursor=None):
+        """Migrate the registration/wishlist lists of one batch of Profiles,
+        then chain a task for the next batch; used by the profile
+        migration task.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        profiles, next_cursor, more = Profile.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+
+        migrated = 0
+        for profile in profiles:
+            if profile.conferenceKeysToAttend or profile.sessionWishList:
+                ConferenceApi._migrateProfileLists(profile.key)
+                migrated += 1
+        logging.info('migrated %d of %d profiles' % (migrated, len(profiles)))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/migrate_profile_lists')
+        return migrated
+
     def _doProfile(self, save_request=None):
         """Get user Profile and return to user, possibly updating it first."""
         # get user Profile
         prof = self._getProfileFromUser()
         # if saveProfile(), process user-modifyable fields
         if save_request:
+            displayName = prof.displayName
+            changed = False
             for field in ('displayName', 'teeShirtSize'):
                 if hasattr(save_request, field):
                     val = getattr(save_request, field)
@@ -503,7 +1039,14 @@ class ConferenceApi(remote.Service):
                             setattr(prof, field, str(val).upper())
                         else:
                             setattr(prof, field, val)
-                        prof.put()
+                        changed = True
+            if changed:
+                prof.put()
+
+            # cached conferences embed the organiser's displayName
+            if prof.displayName != displayName:
+                self._invalidateConferenceCache(*Conference.query(
+                    ancestor=prof.key).fetch(keys_only=True))
 
         # return ProfileForm
         return self._copyProfileToForm(prof)
@@ -523,129 +1066,810 @@ class ConferenceApi(remote.Service):
 
 # - - - Announcements - - - - - - - - - - - - - - - - - - - -
 
+    @staticmethod
+    def _setAnnouncement(entity):
+        """Create Announcement from a NearlySoldOut entity & assign it to
+        memcache.
+
+        At most ANNOUNCEMENT_MAX_CONFERENCES conferences, by name, are
+        listed; the rest are only counted.
+        """
+        conferences = sorted(entity.conferences.items(),
+                             key=lambda item: item[1])
+        shown = conferences[:ANNOUNCEMENT_MAX_CONFERENCES]
+        if shown:
+            # If there are almost sold out conferences,
+            # format announcement
+            names = ', '.join(name for wsck, name in shown)
+            if len(conferences) > len(shown):
+                names += ' and %d more' % (len(conferences) - len(shown))
+            data = ANNOUNCEMENT_TPL % names
+        else:
+            data = ""
+        announcement = {
+            'data': data,
+            'conferences': entity.conferences,
+            'shown': shown,
+            'version': entity.version,
+            'generatedAt': str(entity.generatedAt)
+            if entity.generatedAt else None,
+        }
+        memcache.set(MEMCACHE_ANNOUNCEMENTS_KEY, announcement)
+        return announcement
+
+    @staticmethod
+    def _getAnnouncement():
+        """Return the cached Announcement, rebuilding it from the stored
+        nearly sold out conferences if evicted."""
+        announcement = memcache.get(MEMCACHE_ANNOUNCEMENTS_KEY)
+        if announcement is None:
+            key = ndb.Key(NearlySoldOut, NEARLY_SOLD_OUT_ID)
+            announcement = ConferenceApi._setAnnouncement(
+                key.get() or NearlySoldOut(key=key))
+        return announcement
+
     @staticmethod
     def _cacheAnnouncement():
-        """Create Announcement & assign to memcache; used by
-        memcache cron job & putAnnouncement().
+        """Reconcile the nearly sold out conferences with a query over all
+        conferences & assign the Announcement to memcache; used by
+        memcache cron job & putAnnouncement(). Registrations keep the
+        list up to date in between.
         """
         confs = Conference.query(ndb.AND(
-            Conference.seatsAvailable <= 5,
+            Conference.seatsAvailable <= NEARLY_SOLD_OUT_SEATS,
             Conference.seatsAvailable > 0)
         ).fetch(projection=[Conference.name])
+        conferences = {conf.key.urlsafe(): conf.name for conf in confs}
+
+        @ndb.transactional()
+        def _update():
+            key = ndb.Key(NearlySoldOut, NEARLY_SOLD_OUT_ID)
+            entity = key.get() or NearlySoldOut(key=key)
+            if entity.conferences != conferences or not entity.generatedAt:
+                entity.conferences = conferences
+                entity.version += 1
+                entity.put()
+            return entity
+        return ConferenceApi._setAnnouncement(_update())
 
-        if confs:
-            # If there are almost sold out conferences,
-            # format announcement and set it in memcache
-            announcement = ANNOUNCEMENT_TPL % (
-                ', '.join(conf.name for conf in confs))
-            memcache.set(MEMCACHE_ANNOUNCEMENTS_KEY, announcement)
-        else:
-            # If there are no sold out conferences,
-            # delete the memcache announcements entry
-            announcement = ""
-            memcache.delete(MEMCACHE_ANNOUNCEMENTS_KEY)
+    @staticmethod
+    def _updateNearlySoldOut(conf, seats):
+        """Add conf to, or drop it from, the nearly sold out conferences
+        given its seats available.
 
-        return announcement
+        Only conferences crossing the NEARLY_SOLD_OUT_SEATS threshold (or
+        renamed while listed) touch the datastore; the announcement is
+        rebuilt from the stored list on its next read.
+        """
+        wsck = conf.key.urlsafe()
+        nearly = 0 < seats <= NEARLY_SOLD_OUT_SEATS
+        conferences = ConferenceApi._getAnnouncement()['conferences']
+        if nearly and conferences.get(wsck) == conf.name:
+            return
+        if not nearly and wsck not in conferences:
+            return
+
+        @ndb.transactional()
+        def _update():
+            key = ndb.Key(NearlySoldOut, NEARLY_SOLD_OUT_ID)
+            entity = key.get() or NearlySoldOut(key=key)
+            conferences = dict(entity.conferences)
+            if nearly:
+                conferences[wsck] = conf.name
+            else:
+                conferences.pop(wsck, None)
+            entity.conferences = conferences
+            entity.version += 1
+            entity.put()
+        _update()
+        memcache.delete(MEMCACHE_ANNOUNCEMENTS_KEY)
 
     @staticmethod
-    def _cacheFeaturedSpeakerAnnouncement(speaker, conferenceKey):
-        """Announcing featured speaker. If current checked speaker
-           should be featured, replace any previous speaker"""
-        logging.info('caching information on speaker %s' % speaker)
-        sessions = Session.query(ancestor=ndb.Key(urlsafe=conferenceKey))
-        sessions = sessions.filter(Session.speaker == speaker).fetch()
-
-        cache_speaker = {}
-        if len(sessions) > 1:
-            sessionNames = [session.sessionName for session in sessions]
-            cache_speaker['speaker'] = speaker
-            cache_speaker['sessionNames'] = sessionNames
-
-            if not memcache.set(MEMCACHE_FEATURED_SPEAKER_KEY, cache_speaker):
-                logging.error(
-                    'Memcache has failed to add speaker %s:.' %
-                    speaker)
-        else:
-            logging.warning('Speaker is %s is not cached' % speaker)
+    def _featuredSpeakerChanged(websafeConferenceKey, speaker=None):
+        """Schedule a featured speaker update for a conference.
+
+        The speaker is queued in the featured-speakers pull queue under a
+        task name unique per (conference, speaker, FEATURED_SPEAKER_DELAY
+        window), and one named task per conference and window processes
+        everything queued. Without a speaker a separately named task
+        recomputes the featured speaker from all of the conference's
+        sessions, e.g. after an import.
+        """
+        window = int(time.time()) // FEATURED_SPEAKER_DELAY
+        conf_hash = hashlib.md5(
+            websafeConferenceKey.encode('utf-8')).hexdigest()
+        if not speaker:
+            ConferenceApi._incrementStat('featured_speaker_enqueued')
+            ConferenceApi._enqueueOnce(
+                '/tasks/set_featured_speaker',
+                'featured-all-%s-%d' % (conf_hash, window),
+                {'conferenceKey': websafeConferenceKey, 'allSpeakers': '1'},
+                countdown=FEATURED_SPEAKER_DELAY)
+            return
+
+        try:
+            taskqueue.Queue(FEATURED_SPEAKER_QUEUE).add(taskqueue.Task(
+                method='PULL', tag=websafeConferenceKey,
+                payload=speaker.encode('utf-8'),
+                name='featured-%s-%s-%d' % (
+                    conf_hash,
+                    hashlib.md5(speaker.encode('utf-8')).hexdigest(),
+                    window)))
+        except (taskqueue.TaskAlreadyExistsError,
+                taskqueue.TombstonedTaskError):
+            ConferenceApi._incrementStat('featured_speaker_coalesced')
+            return
+        ConferenceApi._incrementStat('featured_speaker_enqueued')
+        ConferenceApi._enqueueOnce(
+            '/tasks/set_featured_speaker',
+            'featured-%s-%d' % (conf_hash, window),
+            {'conferenceKey': websafeConferenceKey},
+            countdown=FEATURED_SPEAKER_DELAY)
 
+    @staticmethod
+    def _setFeaturedSpeakers(conferenceKey, speaker=None, allSpeakers=False):
+        """Update the featured speaker from the speakers queued for a
+        conference, or from all of its sessions with allSpeakers; used by
+        the set_featured_speaker task.
+
+        speaker is only passed by tasks enqueued before speakers were
+        queued. An earlier task may already have leased everything queued,
+        in which case there is nothing to do. Returns the cached featured
+        speaker, if any.
+        """
+        queue = taskqueue.Queue(FEATURED_SPEAKER_QUEUE)
+        tasks = []
+        while True:
+            leased = queue.lease_tasks_by_tag(
+                FEATURED_SPEAKER_LEASE, FEATURED_SPEAKER_LEASE_SIZE,
+                tag=conferenceKey)
+            tasks.extend(leased)
+            if len(leased) < FEATURED_SPEAKER_LEASE_SIZE:
+                break
+
+        speakers = set(task.payload.decode('utf-8') for task in tasks)
+        if speaker:
+            speakers.add(speaker)
+        if not speakers and not allSpeakers:
+            ConferenceApi._incrementStat('featured_speaker_empty')
+            return None
+        cache_speaker = ConferenceApi._cacheFeaturedSpeakerAnnouncement(
+            speakers, conferenceKey, allSpeakers)
+        if tasks:
+            queue.delete_tasks(tasks)
+
+        ConferenceApi._incrementStat('featured_speaker_executed')
+        ConferenceApi._incrementStat('featured_speaker_speakers',
+                                     len(speakers))
+        return cache_speaker
+
+    @staticmethod
+    def _speakerSessionNames(c_key, speakers, allSpeakers=False):
+        """Return {normalized speaker name: (speaker name, session names
+        in the conference c_key)}.
+
+        Names are read from the denormalized Speaker entities of the given
+        speakers, or from one scan of the conference's sessions with
+        allSpeakers; either way spellings of a name that only differ in
+        case or whitespace count as one speaker.
+        """
+        sessionNames = {}
+        if allSpeakers:
+            for session in Session.query(ancestor=c_key):
+                if session.speaker:
+                    sessionNames.setdefault(
+                        ConferenceApi._normalizeName(session.speaker),
+                        (session.speaker, []))[1].append(session.sessionName)
+            return sessionNames
+
+        names = {}
+        for name in speakers:
+            names.setdefault(ConferenceApi._normalizeName(name), name)
+        normalized = list(names)
+        entities = ndb.get_multi(
+            [ConferenceApi._speakerKey(name) for name in normalized])
+        for name, speaker in zip(normalized, entities):
+            sessionNames[name] = (speaker.name, [
+                session_name for key, session_name
+                in zip(speaker.session_keys, speaker.session_names)
+                if key.parent() == c_key]) if speaker else (names[name], [])
+        return sessionNames
+
+    @staticmethod
+    def _cacheFeaturedSpeakerAnnouncement(speakers, conferenceKey,
+                                          allSpeakers=False):
+        """Announcing featured speaker. Of the given speakers (all of the
+           conference's with allSpeakers), the session counts of the
+           conference's FeaturedSpeaker aggregate are refreshed; the
+           speaker with the most sessions in the aggregate is featured if
+           they have more than one"""
+        logging.info('caching information on speakers %s' %
+                     ('all' if allSpeakers else ', '.join(speakers)))
+        c_key = ndb.Key(urlsafe=conferenceKey)
+        sessionNames = ConferenceApi._speakerSessionNames(
+            c_key, speakers, allSpeakers)
+
+        # the Speaker entity of a newly leading speaker is read in the
+        # same transaction
+        @ndb.transactional(xg=True)
+        def _update():
+            featured = (ndb.Key(FeaturedSpeaker, conferenceKey).get() or
+                        FeaturedSpeaker(id=conferenceKey))
+            # refresh the per speaker session counts of the aggregate,
+            # keyed by normalized name; a scan of all sessions replaces it
+            counts = {}
+            if not allSpeakers:
+                for name, count in featured.sessionCounts.items():
+                    counts[ConferenceApi._normalizeName(name)] = count
+            for name, (_, names) in sessionNames.items():
+                counts[name] = len(names)
+            counts = {name: count for name, count in counts.items() if count}
+            featured.sessionCounts = counts
+
+            # the leader over the whole aggregate, keeping the current
+            # speaker on ties
+            current = ConferenceApi._normalizeName(featured.speaker or '')
+            candidates = [name for name in counts if counts[name] > 1]
+            if candidates:
+                speaker = max(candidates, key=lambda name: (
+                    counts[name], name == current, name))
+                if speaker in sessionNames:
+                    featured.speaker, featured.sessionNames = (
+                        sessionNames[speaker])
+                elif speaker != current:
+                    featured.speaker, featured.sessionNames = (
+                        ConferenceApi._speakerSessionNames(
+                            c_key, [speaker])[speaker])
+            featured.put()
+            return featured
+
+        featured = _update()
+        if not featured.speaker:
+            logging.warning('No speaker featured for %s' % conferenceKey)
+            return {}
+        cache_speaker = {'speaker': featured.speaker,
+                         'sessionNames': featured.sessionNames}
+        if memcache.set_multi({
+                MEMCACHE_FEATURED_SPEAKER_KEY % conferenceKey: cache_speaker,
+                # latest featured speaker across conferences
+                MEMCACHE_LATEST_FEATURED_SPEAKER_KEY: cache_speaker}):
+            logging.error(
+                'Memcache has failed to add speaker %s:.' %
+                featured.speaker)
         return cache_speaker
 
-    @endpoints.method(message_types.VoidMessage, StringMessage,
+    @endpoints.method(ANNOUNCEMENT_GET_REQUEST, AnnouncementForm,
                       path='conference/announcement/get',
                       http_method='GET', name='getAnnouncement')
     def getAnnouncement(self, request):
-        """Return Announcement from memcache."""
-        return StringMessage(data=memcache.get(
-            MEMCACHE_ANNOUNCEMENTS_KEY) or "")
+        """Return Announcement from memcache.
+
+        Clients pass the etag of their copy as ifNoneMatch (or in an
+        If-None-Match header) and only get unchanged back while it is
+        current.
+        """
+        announcement = self._getAnnouncement()
+        etag = ANNOUNCEMENT_ETAG_TPL % announcement['version']
+        if_none_match = request.ifNoneMatch or self.request_state.headers.get(
+            'If-None-Match')
+        if if_none_match == etag:
+            return AnnouncementForm(etag=etag, unchanged=True)
+
+        return AnnouncementForm(
+            data=announcement['data'],
+            conferences=[AnnouncementConferenceForm(
+                websafeConferenceKey=wsck, name=name)
+                for wsck, name in announcement['shown']],
+            version=announcement['version'],
+            generatedAt=announcement['generatedAt'],
+            etag=etag,
+            unchanged=False,
+            truncated=len(announcement['shown']) < len(
+                announcement['conferences']),
+            totalConferences=len(announcement['conferences']),
+        )
+
+    @staticmethod
+    def _conferenceKey(websafeConferenceKey):
+        """Return the Conference key of a websafe key; raises
+        BadRequestException if it is not a valid Conference key."""
+        try:
+            c_key = ndb.Key(urlsafe=str(websafeConferenceKey))
+        except Exception:
+            c_key = None
+        if c_key is None or c_key.kind() != 'Conference':
+            raise endpoints.BadRequestException(
+                'Invalid websafeConferenceKey: %s' % websafeConferenceKey)
+        return c_key
+
+    @staticmethod
+    def _getFeaturedSpeakers(websafeConferenceKeys):
+        """Return {websafe conference key: cached featured speaker}.
+
+        Entries are read from memcache with one get_multi; evicted ones
+        are restored from their FeaturedSpeaker entities, and existing
+        conferences without one get a featured speaker update scheduled.
+        Raises BadRequestException for keys that are not Conference keys
+        and NotFoundException for conferences that do not exist.
+        """
+        c_keys = {wsck: ConferenceApi._conferenceKey(wsck)
+                  for wsck in websafeConferenceKeys}
+        cache_keys = {MEMCACHE_FEATURED_SPEAKER_KEY % wsck: wsck
+                      for wsck in websafeConferenceKeys}
+        cached = memcache.get_multi(cache_keys.keys())
+        featured = {cache_keys[key]: value for key, value in cached.items()}
+
+        missing = [wsck for wsck in websafeConferenceKeys
+                   if wsck not in featured]
+        if missing:
+            restored = {}
+            entities = ndb.get_multi(
+                [ndb.Key(FeaturedSpeaker, wsck) for wsck in missing])
+            unknown = [wsck for wsck, entity in zip(missing, entities)
+                       if entity is None]
+            for wsck, conf in zip(unknown, ndb.get_multi(
+                    [c_keys[wsck] for wsck in unknown])):
+                if conf is None:
+                    raise endpoints.NotFoundException(
+                        'No conference found with key: %s' % wsck)
+            for wsck, entity in zip(missing, entities):
+                if entity is None:
+                    ConferenceApi._featuredSpeakerChanged(wsck)
+                elif entity.speaker:
+                    restored[wsck] = {'speaker': entity.speaker,
+                                      'sessionNames': entity.sessionNames}
+            memcache.set_multi({MEMCACHE_FEATURED_SPEAKER_KEY % wsck: value
+                                for wsck, value in restored.items()})
+            featured.update(restored)
+        return featured
+
+    @staticmethod
+    def _copyFeaturedSpeakerToForm(data, form):
+        """Copy a cached featured speaker into form."""
+        if data is not None:
+            logging.info('showing information for data %s:' % data)
+            setattr(form, 'speaker', data['speaker'])
+            setattr(form, 'sessionNames', data['sessionNames'])
+        else:
+            logging.warning('No information has been cached.')
+            setattr(form, 'speaker', 'No Featured Speaker')
+            setattr(form, 'sessionNames', [])
+        form.check_initialized()
+        return form
 
     @endpoints.method(SPEAKER_GET_REQUEST, SpeakerForm,
                       path='showfeaturedSpeaker',
                       http_method='GET', name='getFeaturedSpeaker')
     def getFeaturedSpeaker(self, request):
         """getFeaturedSpeaker -- Returns featured speaker from memcache."""
-        data = memcache.get(MEMCACHE_FEATURED_SPEAKER_KEY)
+        if request.websafeConferenceKey:
+            data = self._getFeaturedSpeakers(
+                [request.websafeConferenceKey]).get(
+                    request.websafeConferenceKey)
+        else:
+            data = memcache.get(MEMCACHE_LATEST_FEATURED_SPEAKER_KEY)
+        return self._copyFeaturedSpeakerToForm(data, SpeakerForm())
+
+    @endpoints.method(FEATURED_SPEAKERS_GET_REQUEST, FeaturedSpeakerForms,
+                      path='featuredSpeakers',
+                      http_method='GET', name='getFeaturedSpeakers')
+    def getFeaturedSpeakers(self, request):
+        """getFeaturedSpeakers -- Returns the featured speakers of the given
+        conferences."""
+        featured = self._getFeaturedSpeakers(request.websafeConferenceKey)
+        return FeaturedSpeakerForms(
+            items=[self._copyFeaturedSpeakerToForm(
+                featured.get(wsck),
+                FeaturedSpeakerForm(websafeConferenceKey=wsck))
+                for wsck in request.websafeConferenceKey]
+        )
 
-        speaker_form = SpeakerForm()
-        if data is not None:
-            logging.info('showing information for data %s:' % data)
-            setattr(speaker_form, 'speaker', data['speaker'])
-            setattr(speaker_form, 'sessionNames', data['sessionNames'])
+# - - - Search - - - - - - - - - - - - - - - - - - - - - - -
+
+    @staticmethod
+    def _searchTokens(text):
+        """Split text into lowercase search tokens of 2+ characters."""
+        return [token for token in SEARCH_TOKEN_RE.findall(text.lower())
+                if len(token) > 1]
+
+    @staticmethod
+    def _searchPostings(entity, fields):
+        """Return the SearchPosting children of entity for the (property,
+        weight) pairs in fields; at most SEARCH_MAX_TOKENS, heaviest
+        first."""
+        weights = collections.Counter()
+        for name, boost in fields:
+            values = getattr(entity, name)
+            if not isinstance(values, list):
+                values = [values]
+            for text in values:
+                if text:
+                    for token in ConferenceApi._searchTokens(text):
+                        weights[token] += boost
+        kind = entity.key.kind()
+        return [SearchPosting(key=ndb.Key(SearchPosting, token,
+                                          parent=entity.key),
+                              kind=kind, token=token, weight=weight)
+                for token, weight in weights.most_common(SEARCH_MAX_TOKENS)]
+
+    @staticmethod
+    def _search(kind, text, ancestor=None):
+        """Return the keys of the kind entities matching every token of
+        text, best match first.
+
+        Each query token matches indexed tokens it is a prefix of (whole
+        tokens only below SEARCH_PREFIX_MIN_LENGTH), exact matches
+        counting double. An entity scores the sum over query tokens of
+        its best matching posting weight.
+
+        The postings of all tokens, restricted to the ancestor's
+        descendants if given, are read concurrently, at most
+        SEARCH_MAX_POSTINGS each. The intersection starts from the
+        rarest fully read token; candidates missing from a token's
+        truncated postings are checked for an exact posting by key. If
+        every token was truncated, only the first postings scanned are
+        considered. The ranking is cached for SEARCH_CACHE_TTL seconds so
+        later pages do not search again.
+        """
+        tokens = []
+        for token in ConferenceApi._searchTokens(text):
+            if token not in tokens:
+                tokens.append(token)
+        if not tokens:
+            raise endpoints.BadRequestException(
+                "'query' needs a word of at least 2 characters.")
+        tokens = tokens[:SEARCH_MAX_QUERY_TOKENS]
+
+        cache_key = MEMCACHE_SEARCH_KEY % hashlib.md5(repr((
+            kind, ancestor.urlsafe() if ancestor else None,
+            tokens)).encode('utf-8')).hexdigest()
+        cached = memcache.get(cache_key)
+        if cached is not None:
+            return [ndb.Key(urlsafe=key) for key in cached]
+
+        futures = [(token, ConferenceApi._searchTokenScores(
+            kind, token, ancestor)) for token in tokens]
+        results = [(token, future.get_result()) for token, future in futures]
+
+        complete = [result for result in results if result[1][1]]
+        driver = min(complete or results, key=lambda result: len(result[1][0]))
+        if not complete:
+            logging.warning('search %r scanned only %d postings per word' % (
+                tokens, SEARCH_MAX_POSTINGS))
+
+        scores = dict(driver[1][0])
+        for token, (token_scores, is_complete) in results:
+            if token == driver[0] or not scores:
+                continue
+            if not is_complete:
+                unseen = [key for key in scores if key not in token_scores]
+                postings = ndb.get_multi(
+                    [ndb.Key(SearchPosting, token, parent=key)
+                     for key in unseen])
+                for key, posting in zip(unseen, postings):
+                    if posting:
+                        token_scores[key] = posting.weight * 2
+            scores = {key: scores[key] + token_scores[key]
+                      for key in scores if key in token_scores}
+
+        ranked = sorted(scores, key=lambda key: (-scores[key], key.id()))
+        memcache.set(cache_key, [key.urlsafe() for key in ranked],
+                     time=SEARCH_CACHE_TTL)
+        return ranked
+
+    @staticmethod
+    @ndb.tasklet
+    def _searchTokenScores(kind, token, ancestor=None):
+        """Tasklet: score the kind entities with postings matching token,
+        as ({entity key: best posting weight}, complete), reading at most
+        SEARCH_MAX_POSTINGS postings a page of SEARCH_POSTINGS_BATCH at a
+        time; complete is False if postings were left unread."""
+        if len(token) < SEARCH_PREFIX_MIN_LENGTH:
+            query = SearchPosting.query(
+                SearchPosting.kind == kind,
+                SearchPosting.token == token,
+                ancestor=ancestor)
         else:
-            logging.warning('No information has been cached.')
-            setattr(speaker_form, 'speaker', 'No Featured Speaker')
-            setattr(speaker_form, 'sessionNames', [])
+            query = SearchPosting.query(
+                SearchPosting.kind == kind,
+                SearchPosting.token >= token,
+                SearchPosting.token < token + u'\ufffd',
+                ancestor=ancestor)
+        token_scores = {}
+        scanned = 0
+        cursor, more = None, True
+        while more and scanned < SEARCH_MAX_POSTINGS:
+            postings, cursor, more = yield query.fetch_page_async(
+                min(SEARCH_POSTINGS_BATCH, SEARCH_MAX_POSTINGS - scanned),
+                start_cursor=cursor)
+            scanned += len(postings)
+            for posting in postings:
+                key = posting.key.parent()
+                weight = posting.weight * (2 if posting.token == token else 1)
+                token_scores[key] = max(token_scores.get(key, 0), weight)
+            more = more and cursor is not None
+        raise ndb.Return((token_scores, not more))
+
+    def _searchPage(self, kind, request, ancestor=None):
+        """Return (entities, nextPageToken) of one page of search results;
+        pageToken is the offset of the page in the ranked results."""
+        page_size = request.pageSize or SEARCH_PAGE_SIZE
+        if page_size < 0 or page_size > MAX_PAGE_SIZE:
+            raise endpoints.BadRequestException(
+                "'pageSize' must be between 1 and %d." % MAX_PAGE_SIZE)
+        try:
+            offset = int(request.pageToken or 0)
+        except ValueError:
+            offset = -1
+        if offset < 0:
+            raise endpoints.BadRequestException(
+                "Invalid 'pageToken': %s" % request.pageToken)
+
+        keys = self._search(kind, request.query, ancestor)
+        page = [entity for entity in ndb.get_multi(
+            keys[offset:offset + page_size]) if entity]
+        more = len(keys) > offset + page_size
+        return page, str(offset + page_size) if more else None
+
+    @endpoints.method(CONF_SEARCH_REQUEST, ConferenceForms,
+                      path='searchConferences',
+                      http_method='GET', name='searchConferences')
+    def searchConferences(self, request):
+        """searchConferences -- Returns conferences matching the words in
+        query, best match first."""
+        conferences, next_token = self._searchPage('Conference', request)
+        names = self._getOrganiserNames(conferences)
+        return ConferenceForms(
+            items=[self._copyConferenceToForm(
+                conf, names.get(conf.organizerUserId))
+                for conf in conferences],
+            nextPageToken=next_token)
+
+    @endpoints.method(SESSION_SEARCH_REQUEST, SessionForms,
+                      path='searchSessions',
+                      http_method='GET', name='searchSessions')
+    def searchSessions(self, request):
+        """searchSessions -- Returns sessions, of a given conference if
+        websafeConferenceKey is passed, matching the words in query, best
+        match first."""
+        ancestor = None
+        if request.websafeConferenceKey:
+            ancestor = ndb.Key(urlsafe=request.websafeConferenceKey)
+        sessions, next_token = self._searchPage('Session', request, ancestor)
+        return SessionForms(
+            items=[self._copySessionToForm(session) for session in sessions],
+            nextPageToken=next_token)
 
-        speaker_form.check_initialized()
-        return speaker_form
+    @staticmethod
+    def _backfillSearchIndex(kind='Conference', cursor=None):
+        """Write the search postings of one batch of conferences or
+        sessions, then chain a task for the next batch, moving on from
+        conferences to sessions; used by the search index backfill task.
+        """
+        model, fields = {
+            'Conference': (Conference, CONFERENCE_SEARCH_FIELDS),
+            'Session': (Session, SESSION_SEARCH_FIELDS),
+        }[kind]
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        entities, next_cursor, more = model.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+
+        postings = []
+        for entity in entities:
+            postings.extend(ConferenceApi._searchPostings(entity, fields))
+        ndb.put_multi(postings)
+        logging.info('indexed %d %s entities' % (len(entities), kind))
+
+        if more and next_cursor:
+            taskqueue.add(params={'kind': kind,
+                                  'cursor': next_cursor.urlsafe()},
+                          url='/tasks/backfill_search_index')
+        elif kind == 'Conference':
+            taskqueue.add(params={'kind': 'Session'},
+                          url='/tasks/backfill_search_index')
+        return len(entities)
 
 # - - - Registration - - - - - - - - - - - - - - - - - - - -
 
+    @staticmethod
+    def _seatShardKeys(c_key, count=None):
+        """Return the SeatShard keys of a Conference key; count is the
+        conference's seatShardCount, SEAT_SHARD_COUNT if unset."""
+        wsck = c_key.urlsafe()
+        return [ndb.Key(SeatShard, '%s-%d' % (wsck, index))
+                for index in range(count or SEAT_SHARD_COUNT)]
+
+    @staticmethod
     @ndb.transactional(xg=True)
+    def _initSeatShards(c_key, seats, count=None):
+        """Split seats evenly across the seat shards of a conference and
+        return them; transactional so the shards exist all or nothing.
+        """
+        keys = ConferenceApi._seatShardKeys(c_key, count)
+        per_shard, extra = divmod(max(seats or 0, 0), len(keys))
+        shards = [SeatShard(key=key,
+                            seatsAvailable=per_shard + (index < extra))
+                  for index, key in enumerate(keys)]
+        ndb.put_multi(shards)
+        return shards
+
+    @staticmethod
+    def _getSeatShard(conf, key):
+        """Return the SeatShard for key.
+
+        Only a conference that predates seat shards (no seatShardCount
+        and no first shard, which seeding always writes) has all its
+        shards seeded from conf.seatsAvailable; any other missing shard
+        starts out empty, as conf.seatsAvailable lags behind the shards.
+        """
+        shard = key.get()
+        if shard is not None:
+            return shard
+        first_key = ConferenceApi._seatShardKeys(conf.key, 1)[0]
+        if conf.seatShardCount is None and (
+                key == first_key or first_key.get() is None):
+            ConferenceApi._initSeatShards(conf.key, conf.seatsAvailable)
+            return key.get()
+        return SeatShard(key=key, seatsAvailable=0)
+
+    @staticmethod
+    def _takeSeat(conf):
+        """Take one seat from a random non-empty shard of conf.
+
+        Must run inside an xg transaction; shards never drop below zero,
+        so a conference cannot be oversold. Shards are read one at a time
+        so a registration usually touches a single one. Returns False
+        when every shard is empty.
+        """
+        keys = ConferenceApi._seatShardKeys(conf.key, conf.seatShardCount)
+        random.shuffle(keys)
+        for key in keys:
+            shard = ConferenceApi._getSeatShard(conf, key)
+            if shard.seatsAvailable > 0:
+                shard.seatsAvailable -= 1
+                shard.put()
+                return True
+        return False
+
+    @staticmethod
+    def _returnSeat(conf):
+        """Give one seat back to a random shard of conf (in a transaction)."""
+        shard = ConferenceApi._getSeatShard(conf, random.choice(
+            ConferenceApi._seatShardKeys(conf.key, conf.seatShardCount)))
+        shard.seatsAvailable += 1
+        shard.put()
+
+    @staticmethod
+    def _getSeatsAvailable(conf):
+        """Return the seats available for conf, summed over its shards.
+
+        The total is cached in memcache until the next registration, and
+        for at most SEATS_CACHE_TTL seconds in case it was read while a
+        registration committed.
+        """
+        cache_key = MEMCACHE_SEATS_KEY % conf.key.urlsafe()
+        seats = memcache.get(cache_key)
+        if seats is None:
+            shards = [shard for shard in ndb.get_multi(
+                ConferenceApi._seatShardKeys(conf.key, conf.seatShardCount))
+                if shard]
+            if shards:
+                seats = sum(shard.seatsAvailable for shard in shards)
+            else:
+                seats = conf.seatsAvailable
+            memcache.set(cache_key, seats, time=SEATS_CACHE_TTL)
+        return seats
+
+    @staticmethod
+    def _syncSeatsAvailable(websafeConferenceKey):
+        """Write the shard total back to Conference.seatsAvailable, which
+        the announcement query filters on; used by the seat sync task.
+        """
+        c_key = ndb.Key(urlsafe=websafeConferenceKey)
+        memcache.delete(MEMCACHE_SEATS_KEY % websafeConferenceKey)
+        conf = c_key.get()
+        if not conf:
+            return
+        seats = ConferenceApi._getSeatsAvailable(conf)
+
+        @ndb.transactional()
+        def _update():
+            conf = c_key.get()
+            if (conf.seatsAvailable != seats or
+                    conf.seatShardCount is None):
+                conf.seatsAvailable = seats
+                # pin the shard count of conferences that predate it
+                conf.seatShardCount = conf.seatShardCount or SEAT_SHARD_COUNT
+                conf.put()
+        _update()
+        ConferenceApi._invalidateConferenceCache(c_key)
+
+    @staticmethod
+    def _enqueueOnce(url, name, params, countdown=0):
+        """Add a named task; a task already added under that name wins.
+
+        Returns True if the task was enqueued.
+        """
+        try:
+            taskqueue.add(url=url, name=name, params=params,
+                          countdown=countdown)
+        except (taskqueue.TaskAlreadyExistsError,
+                taskqueue.TombstonedTaskError):
+            return False
+        return True
+
+    def _seatsChanged(self, c_key):
+        """Refresh caches and the nearly sold out conferences after a
+        registration and schedule one seatsAvailable sync per conference
+        every SEAT_SYNC_DELAY seconds.
+        """
+        wsck = c_key.urlsafe()
+        memcache.delete(MEMCACHE_SEATS_KEY % wsck)
+        self._invalidateConferenceCache(c_key)
+        conf = c_key.get()
+        self._updateNearlySoldOut(conf, self._getSeatsAvailable(conf))
+        self._enqueueOnce(
+            '/tasks/sync_seats_available',
+            'sync-seats-%s-%d' % (hashlib.md5(wsck).hexdigest(),
+                                  int(time.time()) // SEAT_SYNC_DELAY),
+            {'websafeConferenceKey': wsck},
+            countdown=SEAT_SYNC_DELAY)
+
     def _conferenceRegistration(self, request, reg=True):
         """Register or unregister user for selected conference."""
-        retval = None
-        prof = self._getProfileFromUser()  # get user Profile
-
         # check if conf exists given websafeConfKey
-        # get conference; check that it exists
+        # get conference; check that it exists. It is read before the
+        # transaction: only its key and seatShardCount are needed, and
+        # the seat sync rewrites it while registrations are running
         wsck = request.websafeConferenceKey
         conf = ndb.Key(urlsafe=wsck).get()
         if not conf:
             raise endpoints.NotFoundException(
                 'No conference found with key: %s' % wsck)
+        return self._updateRegistration(conf, reg)
+
+    @ndb.transactional(xg=True)
+    def _updateRegistration(self, conf, reg=True):
+        """Register or unregister user for conf, taking or returning one
+        of its seats."""
+        retval = None
+        prof = self._getProfileFromUser()  # get user Profile
+
+        # a registration is a child of the Profile, so checking for one
+        # is a get by key in the same entity group
+        reg_key = self._registrationKey(prof.key, conf.key)
+        registration = reg_key.get()
 
         # register
         if reg:
             # check if user already registered otherwise add
-            if wsck in prof.conferenceKeysToAttend:
+            if registration:
                 raise ConflictException(
                     "You have already registered for this conference")
 
-            # check if seats avail
-            if conf.seatsAvailable <= 0:
+            # check if seats avail, taking one away from a seat shard
+            if not self._takeSeat(conf):
                 raise ConflictException(
                     "There are no seats available.")
 
-            # register user, take away one seat
-            prof.conferenceKeysToAttend.append(wsck)
-            conf.seatsAvailable -= 1
+            # register user
+            Registration(key=reg_key, conference=conf.key).put()
             retval = True
 
         # unregister
         else:
             # check if user already registered
-            if wsck in prof.conferenceKeysToAttend:
+            if registration:
 
                 # unregister user, add back one seat
-                prof.conferenceKeysToAttend.remove(wsck)
-                conf.seatsAvailable += 1
+                reg_key.delete()
+                self._returnSeat(conf)
                 retval = True
             else:
                 retval = False
 
-        # write things back to the datastore & return
-        prof.put()
-        conf.put()
+        # neither the Profile nor the Conference is rewritten, so
+        # registrations don't contend on them
         return BooleanMessage(data=retval)
 
     @endpoints.method(message_types.VoidMessage, ConferenceForms,
@@ -654,40 +1878,48 @@ class ConferenceApi(remote.Service):
     def getConferencesToAttend(self, request):
         """Get list of conferences that user has registered for."""
         prof = self._getProfileFromUser()  # get user Profile
-        conf_keys = [ndb.Key(urlsafe=wsck)
-                     for wsck in prof.conferenceKeysToAttend]
-        conferences = ndb.get_multi(conf_keys)
-
-        # get organizers
-        organisers = [ndb.Key(Profile, conf.organizerUserId)
-                      for conf in conferences]
-        profiles = ndb.get_multi(organisers)
-
-        # put display names in a dict for easier fetching
-        names = {}
-        for profile in profiles:
-            names[profile.key.id()] = profile.displayName
+        # each organiser lookup starts as soon as its conference arrives;
+        # ndb batches the concurrent gets
+        reg_keys = Registration.query(ancestor=prof.key).fetch(keys_only=True)
+        futures = [self._getConferenceAndOrganiserName(
+                   ndb.Key(urlsafe=reg_key.id())) for reg_key in reg_keys]
+        ndb.Future.wait_all(futures)
+        results = [future.get_result() for future in futures]
 
         # return set of ConferenceForm objects per Conference
         return ConferenceForms(
             items=[
-                self._copyConferenceToForm(
-                    conf, names[
-                        conf.organizerUserId]) for conf in conferences])
+                self._copyConferenceToForm(conf, displayName)
+                for conf, displayName in results if conf])
+
+    @ndb.tasklet
+    def _getConferenceAndOrganiserName(self, c_key):
+        """Tasklet: fetch a Conference and its organiser's displayName."""
+        conf = yield c_key.get_async()
+        if not conf or not conf.organizerUserId:
+            raise ndb.Return((conf, None))
+        prof = yield ndb.Key(Profile, conf.organizerUserId).get_async()
+        raise ndb.Return((conf, getattr(prof, 'displayName', None)))
 
     @endpoints.method(CONF_GET_REQUEST, BooleanMessage,
                       path='conference/{websafeConferenceKey}',
                       http_method='POST', name='registerForConference')
     def registerForConference(self, request):
         """Register user for selected conference."""
-        return self._conferenceRegistration(request)
+        retval = self._conferenceRegistration(request)
+        # seatsAvailable changed; refresh once the transaction committed
+        self._seatsChanged(ndb.Key(urlsafe=request.websafeConferenceKey))
+        return retval
 
     @endpoints.method(CONF_GET_REQUEST, BooleanMessage,
                       path='conference/{websafeConferenceKey}',
                       http_method='DELETE', name='unregisterFromConference')
     def unregisterFromConference(self, request):
         """Unregister user for selected conference."""
-        return self._conferenceRegistration(request, reg=False)
+        retval = self._conferenceRegistration(request, reg=False)
+        # seatsAvailable changed; refresh once the transaction committed
+        self._seatsChanged(ndb.Key(urlsafe=request.websafeConferenceKey))
+        return retval
 
     @endpoints.method(message_types.VoidMessage, ConferenceForms,
                       path='filterPlayground',
@@ -712,25 +1944,46 @@ class ConferenceApi(remote.Service):
 # - - - Speaker objects - - - - - - - - - - - - - - - - - - -
 
     def _copySpeakerToForm(self, speaker):
-        """Copy relevant fields from Profile to ProfileForm."""
-        # copy relevant fields from Profile to ProfileForm
-        spf = SpeakerForm()
-        for field in spf.all_fields():
-            if hasattr(speaker, field.name):
-                setattr(spf, field.name, getattr(speaker, field.name))
-
+        """Copy relevant fields from Speaker to SpeakerForm."""
+        spf = SpeakerForm(speaker=speaker.name,
+                          sessionNames=speaker.session_names)
         spf.check_initialized()
         return spf
 
+    def _fetchPage(self, query, request, **options):
+        """Run query, one page at a time if the request asks for it.
+
+        Returns (entities, nextPageToken); without a pageSize the whole
+        result set is fetched and nextPageToken is None. options (e.g.
+        keys_only) are passed on to the fetch.
+        """
+        page_size = getattr(request, 'pageSize', None)
+        if not page_size:
+            return query.fetch(**options), None
+        if page_size < 0 or page_size > MAX_PAGE_SIZE:
+            raise endpoints.BadRequestException(
+                "'pageSize' must be between 1 and %d." % MAX_PAGE_SIZE)
+
+        start_cursor = None
+        if request.pageToken:
+            try:
+                start_cursor = Cursor(urlsafe=request.pageToken)
+            except Exception:
+                raise endpoints.BadRequestException(
+                    "Invalid 'pageToken': %s" % request.pageToken)
+
+        entities, cursor, more = query.fetch_page(
+            page_size, start_cursor=start_cursor, **options)
+        next_token = cursor.urlsafe() if more and cursor else None
+        return entities, next_token
+
     def _addSpeakerObject(self, request, data=None):
         """
         addSpeaker -- Adding a speaker to Conference Central App
         :param request: The sequence of object parameters to create a Speaker object
         :return: object contents
         """
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
+        self._getCurrentUser()
 
         if request is not None:
             if not request.speaker:
@@ -740,36 +1993,154 @@ class ConferenceApi(remote.Service):
                     for field in request.all_fields()}
 
             if request.sessionName:
-                session = Session.query(
-                    Session.sessionName == data['sessionName']).get()
-                if session:
-                    data['session_key'] = session.key
-                    del data['sessionName']
+                if request.websafeConferenceKey:
+                    session_key = self._getSessionKeyByName(
+                        ndb.Key(urlsafe=request.websafeConferenceKey),
+                        data['sessionName'])
                 else:
+                    # without a conference, any session of that name
+                    session_key = Session.query(
+                        Session.sessionName == data['sessionName']).get(
+                            keys_only=True)
+                session = session_key.get() if session_key else None
+                if not session:
                     raise endpoints.ForbiddenException(
                         "Session does not exist")
+                # list the stored spelling, not the normalized match
+                data['session_key'] = session_key
+                data['sessionName'] = session.sessionName
         elif not data['speaker']:
             raise endpoints.BadRequestException(
                 "Speaker 'speaker' field required")
 
-        speaker = Speaker.query(Speaker.name == data['speaker']).get()
-
-        if speaker:
-            if data['session_key'] in speaker.session_keys:
-                raise endpoints.ForbiddenException(
-                    "Speaker is already part of session")
-            else:
-                # raise endpoints.UnauthorizedException('Bad speaker2 %s' % data)
-                speaker.session_keys.append(data['session_key'])
-        else:
-            speaker = Speaker(
-                name=data['speaker'], session_keys=[
-                    data['session_key']])
+        session_key = data.get('session_key')
+        speaker_key = self._speakerKey(data['speaker'])
 
-        speaker.put()
+        @ndb.transactional()
+        def _upsert():
+            speaker = speaker_key.get() or Speaker(key=speaker_key,
+                                                   name=data['speaker'])
+            if session_key:
+                if session_key in speaker.session_keys:
+                    raise endpoints.ForbiddenException(
+                        "Speaker is already part of session")
+                self._addSessionToSpeaker(
+                    speaker, session_key, data['sessionName'])
+            speaker.put()
+        _upsert()
 
         return BooleanMessage(data=True)
 
+    @staticmethod
+    def _normalizeName(name):
+        """Return name lowercased with runs of whitespace collapsed, as
+        used in name-keyed entity ids."""
+        return ' '.join(name.split()).lower()
+
+    @staticmethod
+    def _speakerKey(name):
+        """Return the key of the Speaker named name."""
+        return ndb.Key(Speaker, ConferenceApi._normalizeName(name))
+
+    @staticmethod
+    def _addSessionToSpeaker(speaker, session_key, sessionName):
+        """Append a session to speaker unless already listed; returns
+        whether it was added."""
+        if session_key in speaker.session_keys:
+            return False
+        # keep the denormalized listing in step with session_keys
+        speaker.session_keys.append(session_key)
+        speaker.session_names.append(sessionName)
+        if session_key.parent() not in speaker.conference_keys:
+            speaker.conference_keys.append(session_key.parent())
+        return True
+
+    @staticmethod
+    def _upsertSpeakers(sessions):
+        """Add sessions to their speakers, creating missing Speakers.
+
+        sessions maps a speaker name to (session key, session name)
+        pairs. Speakers are read and written in cross-group transactions
+        of at most SPEAKER_UPSERT_CHUNK_SIZE speakers. Returns the
+        Speakers written.
+        """
+        additions = {}
+        for name, pairs in sessions.items():
+            key = ConferenceApi._speakerKey(name)
+            additions.setdefault(key, (name, []))[1].extend(pairs)
+        keys = additions.keys()
+
+        @ndb.transactional(xg=True)
+        def _upsert(chunk):
+            speakers = []
+            for key, speaker in zip(chunk, ndb.get_multi(chunk)):
+                name, pairs = additions[key]
+                speaker = speaker or Speaker(key=key, name=name)
+                for session_key, sessionName in pairs:
+                    ConferenceApi._addSessionToSpeaker(
+                        speaker, session_key, sessionName)
+                speakers.append(speaker)
+            ndb.put_multi(speakers)
+            return speakers
+
+        written = []
+        for index in range(0, len(keys), SPEAKER_UPSERT_CHUNK_SIZE):
+            written.extend(
+                _upsert(keys[index:index + SPEAKER_UPSERT_CHUNK_SIZE]))
+        return written
+
+    @staticmethod
+    def _mergeSpeakers(cursor=None):
+        """Merge one batch of Speakers not keyed by their normalized name
+        (legacy entities and duplicates) into the name-keyed Speaker, then
+        chain a task for the next batch; used by the speaker merge task.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        speakers, next_cursor, more = Speaker.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+
+        @ndb.transactional(xg=True)
+        def _merge(source_key, target_key, sessionNames):
+            source, target = ndb.get_multi([source_key, target_key])
+            if source is None:
+                return False
+            if len(source.session_names) == len(source.session_keys):
+                sessionNames = dict(zip(source.session_keys,
+                                        source.session_names))
+            elif any(key not in sessionNames for key in source.session_keys):
+                # sessions added since their names were read; next run
+                return False
+            target = target or Speaker(key=target_key, name=source.name)
+            for session_key in source.session_keys:
+                # None for sessions deleted since
+                if sessionNames[session_key] is not None:
+                    ConferenceApi._addSessionToSpeaker(
+                        target, session_key, sessionNames[session_key])
+            target.put()
+            source_key.delete()
+            return True
+
+        merged = 0
+        for speaker in speakers:
+            target_key = ConferenceApi._speakerKey(speaker.name)
+            if speaker.key == target_key:
+                continue
+            sessionNames = {}
+            if len(speaker.session_names) != len(speaker.session_keys):
+                # not backfilled yet; read the names from the sessions
+                sessions = ndb.get_multi(speaker.session_keys)
+                sessionNames = {
+                    key: session.sessionName if session else None
+                    for key, session in zip(speaker.session_keys, sessions)}
+            if _merge(speaker.key, target_key, sessionNames):
+                merged += 1
+        logging.info('merged %d of %d speakers' % (merged, len(speakers)))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/merge_speakers')
+        return merged
+
     @endpoints.method(AddSpeakerForm, AddSpeakerForm, path='speaker',
                       http_method='POST', name='addSpeaker')
     def addSpeaker(self, request):
@@ -782,52 +2153,31 @@ class ConferenceApi(remote.Service):
                       name='querySpeakers')
     def querySpeakers(self, request):
         """querySpeakers -- Implements Custom Queries for speakers."""
-        speakers = Speaker.query()
+        speakers, next_token = self._fetchPage(
+            Speaker.query().order(Speaker.name), request)
 
         # return set of SpeakerForm objects
         return SpeakerForms(
-            items=[self._copySpeakerToForm(speaker) for speaker in speakers]
+            items=[self._copySpeakerToForm(speaker) for speaker in speakers],
+            nextPageToken=next_token
         )
 
 # - - - Session objects - - - - - - - - - - - - - - - - - - -
 
-    def _copySessionToForm(self, session):
-        """Copy fields from Session to SessionForm."""
+    def _copySessionToForm(self, session, fields=SESSION_FORM_FIELDS):
+        """Copy fields from Session to SessionForm; pass
+        SESSION_SUMMARY_FIELDS for projected summary entities."""
         session_form = SessionForm()
-        for field in session_form.all_fields():
-            if hasattr(session, field.name):
-                if field.name == 'typeOfSession':
-                    setattr(
-                        session_form, field.name, getattr(
-                            SessionType, getattr(
-                                session, field.name)))
-                elif field.name == 'role':
-                    setattr(
-                        session_form, field.name, getattr(
-                            SessionRole, getattr(
-                                session, field.name)))
-                elif field.name in ['date', 'startTime']:
-                    setattr(
-                        session_form, field.name, str(
-                            getattr(
-                                session, field.name)))
-                else:
-                    setattr(
-                        session_form, field.name, getattr(
-                            session, field.name))
-            elif field.name == 'webSafeKey':
-                setattr(session_form, field.name, session.key.urlsafe())
+        for name, convert in fields:
+            value = getattr(session, name)
+            setattr(session_form, name, convert(value) if convert else value)
         return session_form
 
     def _createSessionObject(self, request):
         """Create or update Session object, returning ConferenceForm/request."""
 
         # preload necessary data items
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
-
-        user_id = getUserId(user)
+        user, user_id = self._getCurrentUser()
 
         # update existing conference
         conf = ndb.Key(urlsafe=request.websafeConferenceKey).get()
@@ -854,8 +2204,9 @@ class ConferenceApi(remote.Service):
         data = {field.name: getattr(request, field.name)
                 for field in request.all_fields()}
 
-        session = Session.query(
-            Session.sessionName == request.sessionName).get()
+        # only an existing session is loaded in full
+        session_key = self._getSessionKeyByName(conf.key, request.sessionName)
+        session = session_key.get() if session_key else None
         if session:
             if session.speaker != data['speaker']:
                 session.speaker = data['speaker']
@@ -882,18 +2233,14 @@ class ConferenceApi(remote.Service):
         else:
             self._addNewSession(request)
 
-        taskqueue.add(params={'speaker': data['speaker'],
-                              'conferenceKey': request.websafeConferenceKey},
-                      url='/tasks/set_featured_speaker')
+        self._featuredSpeakerChanged(request.websafeConferenceKey,
+                                     data['speaker'])
 
         return BooleanMessage(data=True)
 
-    def _addNewSession(self, request):
-        # raise endpoints.UnauthorizedException('Bad Session %s' % request)
-        # copy ConferenceForm/ProtoRPC Message into dict
-        data = {field.name: getattr(request, field.name)
-                for field in request.all_fields()}
-
+    @staticmethod
+    def _convertSessionData(data):
+        """Convert SessionForm values in data to Session property values."""
         # convert dates from strings to Date objects; set month based on
         # start_date
         if data['date']:
@@ -916,6 +2263,14 @@ class ConferenceApi(remote.Service):
             data['role'] = str(data['role'])
         else:
             data['role'] = 'Speaker'
+        return data
+
+    def _addNewSession(self, request):
+        # raise endpoints.UnauthorizedException('Bad Session %s' % request)
+        # copy ConferenceForm/ProtoRPC Message into dict
+        data = {field.name: getattr(request, field.name)
+                for field in request.all_fields()}
+        self._convertSessionData(data)
 
         # use the Conference websafe key as parent key for the session
         data['webSafeKey'] = request.websafeConferenceKey
@@ -924,28 +2279,293 @@ class ConferenceApi(remote.Service):
         s_key = ndb.Key(Session, s_id, parent=p_key)
         data['key'] = s_key
 
-        speaker_data = {'session_key': s_key, 'speaker': data['speaker']}
+        del data['websafeConferenceKey']
+
+        # the session and its name entry share the conference entity group
+        @ndb.transactional()
+        def _put():
+            index_key = self._sessionNameKey(p_key, data['sessionName'])
+            if index_key.get():
+                raise ConflictException(
+                    'A session named %s already exists in this conference'
+                    % data['sessionName'])
+            session = Session(**data)
+            ndb.put_multi(
+                [session, SessionNameIndex(key=index_key, session=s_key)] +
+                self._searchPostings(session, SESSION_SEARCH_FIELDS))
+        _put()
+
+        speaker_data = {'session_key': s_key,
+                        'sessionName': data['sessionName'],
+                        'speaker': data['speaker']}
 
         self._addSpeakerObject(None, speaker_data)
 
-        del data['websafeConferenceKey']
+        return BooleanMessage(data=True)
 
-        Session(**data).put()
+    @staticmethod
+    def _sessionNameKey(c_key, sessionName):
+        """Return the SessionNameIndex key of a session name in a
+        conference; names are compared case and whitespace insensitively.
+        """
+        return ndb.Key(SessionNameIndex,
+                       ConferenceApi._normalizeName(sessionName),
+                       parent=c_key)
 
-        return BooleanMessage(data=True)
+    @staticmethod
+    def _getSessionKeyByName(c_key, sessionName):
+        """Return the key of the session named sessionName in the
+        conference c_key, or None; a strongly consistent get."""
+        entry = ConferenceApi._sessionNameKey(c_key, sessionName).get()
+        return entry.session if entry else None
+
+    @staticmethod
+    def _backfillSessionNameIndex(cursor=None):
+        """Add the missing SessionNameIndex entries of one batch of
+        sessions, then chain a task for the next batch; used by the
+        session name index migration task. When names collide the entry
+        already stored wins.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        sessions, next_cursor, more = Session.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor,
+            projection=[Session.sessionName])
+
+        entries = {}
+        for session in sessions:
+            key = ConferenceApi._sessionNameKey(
+                session.key.parent(), session.sessionName)
+            entries.setdefault(key, SessionNameIndex(key=key,
+                                                     session=session.key))
+        keys = entries.keys()
+        missing = [entries[key] for key, entry
+                   in zip(keys, ndb.get_multi(keys)) if entry is None]
+        ndb.put_multi(missing)
+        logging.info('indexed %d of %d session names' % (
+            len(missing), len(sessions)))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/backfill_session_name_index')
+        return len(missing)
+
+    @staticmethod
+    def _importRowData(row):
+        """Return the Session property values of an imported row, a dict
+        keyed by SessionForm field names; raises BadRequestException if
+        the row is incomplete or holds invalid values."""
+        data = {field.name: row.get(field.name) or None
+                for field in SessionForm.all_fields()}
+        if not data['sessionName'] or not data['speaker']:
+            raise endpoints.BadRequestException(
+                "Session 'sessionName' and 'speaker' fields required")
+        try:
+            ConferenceApi._convertSessionData(data)
+            if data['duration']:
+                data['duration'] = int(data['duration'])
+        except (TypeError, ValueError) as e:
+            raise endpoints.BadRequestException(
+                "Invalid session '%s': %s" % (data['sessionName'], e))
+        # stored names must map back onto the form enums
+        for field, enum in (('typeOfSession', SessionType),
+                            ('role', SessionRole)):
+            if data[field] not in enum.names():
+                raise endpoints.BadRequestException(
+                    "Invalid value for '%s' of session '%s': %s" % (
+                        field, data['sessionName'], data[field]))
+        return data
+
+    @staticmethod
+    def _importSessions(c_key, rows, announce=True):
+        """Bulk create sessions in a conference; returns the names of the
+        imported and of the skipped sessions.
+
+        rows are dicts keyed by SessionForm field names. Sessions whose
+        name is already taken in the conference are skipped. Ids are
+        allocated as one range, each distinct speaker is read and written
+        once, entities are stored with put_multi in IMPORT_CHUNK_SIZE
+        chunks and, if announce, one featured speaker task is enqueued.
+        """
+        wsck = c_key.urlsafe()
+        seen = set(ConferenceApi._sessionNameKey(c_key, session.sessionName)
+                   for session in Session.query(ancestor=c_key).fetch(
+                       projection=[Session.sessionName]))
+
+        sessions = []
+        skipped = []
+        # convert every row first, so a bad row rejects the whole batch
+        # before anything is written
+        for data in [ConferenceApi._importRowData(row) for row in rows]:
+            index_key = ConferenceApi._sessionNameKey(
+                c_key, data['sessionName'])
+            if index_key in seen:
+                skipped.append(data['sessionName'])
+                continue
+            seen.add(index_key)
+
+            data['webSafeKey'] = wsck
+            # leave unset properties to their model defaults
+            sessions.append(Session(**{name: value for name, value
+                                       in data.items() if value is not None}))
+        if not sessions:
+            return [], skipped
+
+        # allocate all session ids in one range
+        first, last = Session.allocate_ids(size=len(sessions), parent=c_key)
+        for s_id, session in zip(range(first, last + 1), sessions):
+            session.key = ndb.Key(Session, s_id, parent=c_key)
+
+        entities = sessions + [
+            SessionNameIndex(
+                key=ConferenceApi._sessionNameKey(c_key, session.sessionName),
+                session=session.key) for session in sessions]
+        for session in sessions:
+            entities.extend(ConferenceApi._searchPostings(
+                session, SESSION_SEARCH_FIELDS))
+        for index in range(0, len(entities), IMPORT_CHUNK_SIZE):
+            ndb.put_multi(entities[index:index + IMPORT_CHUNK_SIZE])
+
+        # de-duplicate speakers in memory, reading and writing each once
+        speaker_sessions = {}
+        for session in sessions:
+            speaker_sessions.setdefault(session.speaker, []).append(
+                (session.key, session.sessionName))
+        ConferenceApi._upsertSpeakers(speaker_sessions)
+
+        if announce:
+            ConferenceApi._featuredSpeakerChanged(wsck)
+        return [session.sessionName for session in sessions], skipped
+
+    def _getWishlistSessions(self, prof, conferenceKey=None):
+        """Return the Sessions in a Profile wishlist with one batched get.
+
+        WishlistEntry children are listed keys-only, restricted to
+        conferenceKey if given. Entries of deleted sessions are dropped.
+        """
+        entries = WishlistEntry.query(ancestor=prof.key)
+        if conferenceKey is not None:
+            entries = entries.filter(WishlistEntry.conference == conferenceKey)
+        keys = [ndb.Key(urlsafe=entry_key.id())
+                for entry_key in entries.fetch(keys_only=True)]
+
+        return [session for session in ndb.get_multi(keys) if session]
+
+    def _formatSessionFilters(self, filters):
+        """Parse, check validity and convert user supplied session filters."""
+        formatted_filters = []
+        for f in filters:
+            try:
+                field = SESSION_FIELDS[f.field]
+                op = OPERATORS[f.operator]
+            except KeyError:
+                raise endpoints.BadRequestException(
+                    "Filter contains invalid field or operator.")
+            formatted_filters.append(
+                self._sessionFilter(field, f.value, op))
+        return formatted_filters
+
+    def _sessionFilter(self, field, value, op='='):
+        """Return a session filter, converting value to the property type."""
+        try:
+            if field == 'date':
+                value = datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+            elif field == 'startTime':
+                value = datetime.strptime(str(value)[:5], "%H:%M").time()
+            elif field == 'duration':
+                value = int(value)
+            elif field in ('typeOfSession', 'role'):
+                enum = SessionType if field == 'typeOfSession' else SessionRole
+                if str(value) not in enum.names():
+                    raise ValueError(value)
+                value = str(value)
+        except (TypeError, ValueError):
+            raise endpoints.BadRequestException(
+                "Invalid value for '%s': %s" % (field, value))
+        return {'field': field, 'operator': op, 'value': value}
+
+    def _planSessionQuery(self, c_key, filters):
+        """Split session filters between the datastore and memory.
+
+        The datastore gets the conference ancestor plus the most selective
+        equality filter (SESSION_EQUALITY_PREFERENCE); without one, the
+        inequalities on the first filtered SESSION_RANGE_FIELDS field are
+        used instead. Everything else is applied in memory. Returns
+        (query, memory_filters, plan), plan describing the split.
+        """
+        # a "not a workshop" filter can use the precomputed isWorkshop
+        filters = [{'field': 'isWorkshop', 'operator': '=', 'value': False}
+                   if f['field'] == 'typeOfSession' and
+                   f['operator'] == '!=' and f['value'] == 'Workshop'
+                   else f for f in filters]
+
+        indexed = []
+        for field in SESSION_EQUALITY_PREFERENCE:
+            indexed = [f for f in filters
+                       if f['field'] == field and f['operator'] == '='][:1]
+            if indexed:
+                break
+        else:
+            ranges = [f for f in filters if f['field'] in SESSION_RANGE_FIELDS
+                      and f['operator'] not in ('=', '!=')]
+            if ranges:
+                indexed = [f for f in ranges
+                           if f['field'] == ranges[0]['field']]
+
+        query = Session.query(ancestor=c_key)
+        for f in indexed:
+            query = query.filter(COMPARATORS[f['operator']](
+                getattr(Session, f['field']), f['value']))
+        if indexed and indexed[0]['operator'] != '=':
+            query = query.order(getattr(Session, indexed[0]['field']))
+
+        memory_filters = [f for f in filters if f not in indexed]
+        describe = lambda fs: ', '.join(
+            '%s %s %s' % (f['field'], f['operator'], f['value'])
+            for f in fs) or 'none'
+        plan = 'datastore: ancestor, %s; memory: %s' % (
+            describe(indexed), describe(memory_filters))
+        return query, memory_filters, plan
+
+    def _matchesSessionFilters(self, session, filters):
+        """Return True if session passes every (in memory) filter."""
+        for f in filters:
+            value = getattr(session, f['field'])
+            if value is None or not COMPARATORS[f['operator']](
+                    value, f['value']):
+                return False
+        return True
+
+    def _querySessions(self, c_key, filters, request, explain=False):
+        """Run planned session filters in a conference, returning
+        SessionForms; with explain, the plan and rows scanned are included.
+        """
+        query, memory_filters, plan = self._planSessionQuery(c_key, filters)
+        sessions, next_token = self._fetchPage(query, request)
+
+        # in-memory filters run after paging, so a page may hold fewer
+        # than pageSize sessions; they need whole entities, so summaries
+        # are only trimmed here
+        summary = getattr(request, 'summary', None)
+        fields = SESSION_SUMMARY_FIELDS if summary else SESSION_FORM_FIELDS
+        forms = SessionForms(
+            items=[self._copySessionToForm(session, fields)
+                   for session in sessions
+                   if self._matchesSessionFilters(session, memory_filters)],
+            nextPageToken=next_token,
+            summary=summary
+        )
+        if explain:
+            forms.queryPlan = plan
+            forms.rowsScanned = len(sessions)
+        return forms
 
     def _manageSessionsWishlist(self, request, addToSession=True):
         """Add or remove sessions from user wishlist."""
-        # preload necessary data items
-        user = endpoints.get_current_user()
-        if not user:
-            raise endpoints.UnauthorizedException('Authorization required')
-        user_id = getUserId(user)
-
         retval = False
         prof = self._getProfileFromUser()  # get user Profile
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
 
-        if request.websafeConferenceKey not in prof.conferenceKeysToAttend:
+        if not self._registrationKey(prof.key, c_key).get():
             raise endpoints.ForbiddenException(
                 "You must register to the conference in order to add sessions to wishlist.")
 
@@ -953,43 +2573,52 @@ class ConferenceApi(remote.Service):
             raise endpoints.ForbiddenException(
                 "You must provide a 'sessionName' for the query.")
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey))
+        sessions = Session.query(ancestor=c_key)
 
         sessions = sessions.filter(Session.sessionName == request.session)
 
         if request.speaker:
             sessions = sessions.filter(Session.speaker == request.speaker)
 
-        if not sessions:
+        key = sessions.get(keys_only=True)
+        if not key:
             raise endpoints.NotFoundException(
                 'No sessions found to add to wishlist')
 
-        key = sessions.fetch()[0].key
+        if addToSession and request.checkConflicts:
+            interval = self._sessionInterval(key.get())
+            conflicts = [
+                session.sessionName
+                for session in self._getWishlistSessions(prof)
+                if session.key != key and
+                self._overlaps(interval, self._sessionInterval(session))]
+            if conflicts:
+                raise ConflictException(
+                    "Session overlaps with sessions in your wishlist: %s"
+                    % ', '.join(conflicts))
+
+        entry_key = self._wishlistKey(prof.key, key)
+        entry = entry_key.get()
 
         # add to session
         if addToSession:
             # check if session is already in wishlist
-            if key in prof.sessionWishList:
+            if entry:
                 raise ConflictException(
                     "You already have this session in your wishlist")
 
-            # register user, take away one seat
-            prof.sessionWishList.append(key)
+            WishlistEntry(key=entry_key, session=key, conference=c_key).put()
             retval = True
 
         # unregister
         else:
             # check if session exists in wishlist, and remove it
-            if key in prof.sessionWishList:
-                prof.sessionWishList.remove(key)
+            if entry:
+                entry_key.delete()
                 retval = True
             else:
                 retval = False
 
-        # write things back to the datastore & return
-        prof.put()
-
         return BooleanMessage(data=retval)
 
     @endpoints.method(SESSION_POST_REQUEST, BooleanMessage,
@@ -999,6 +2628,30 @@ class ConferenceApi(remote.Service):
         """createSession -- Creates new session in a conference."""
         return self._createSessionObject(request)
 
+    @endpoints.method(SESSION_IMPORT_POST_REQUEST, SessionImportResultForm,
+                      path='conference/{websafeConferenceKey}/importSessions',
+                      http_method='POST', name='importSessions')
+    def importSessions(self, request):
+        """importSessions -- Creates a batch of sessions in a conference."""
+        user, user_id = self._getCurrentUser()
+
+        conf = ndb.Key(urlsafe=request.websafeConferenceKey).get()
+        # check that conference exists
+        if not conf:
+            raise endpoints.NotFoundException(
+                'No conference found with key: %s' %
+                request.websafeConferenceKey)
+
+        # check that user is owner
+        if user_id != conf.organizerUserId:
+            raise endpoints.ForbiddenException(
+                'Only the owner of the conference can import sessions.')
+
+        rows = [{field.name: getattr(item, field.name)
+                 for field in item.all_fields()} for item in request.items]
+        imported, skipped = self._importSessions(conf.key, rows)
+        return SessionImportResultForm(imported=len(imported), skipped=skipped)
+
     @endpoints.method(
         SESSION_GET_REQUEST,
         SessionForms,
@@ -1009,15 +2662,38 @@ class ConferenceApi(remote.Service):
         """getConferenceSessions -- Returns all sessions in a given conference."""
 
         sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).fetch()
+            urlsafe=request.websafeConferenceKey))
+        if request.summary:
+            sessions, next_token = self._fetchPage(
+                sessions, request, projection=SESSION_SUMMARY_PROJECTION)
+            fields = SESSION_SUMMARY_FIELDS
+        else:
+            sessions, next_token = self._fetchPage(sessions, request)
+            fields = SESSION_FORM_FIELDS
 
         # return set of SessionForm objects
         return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
+            items=[self._copySessionToForm(session, fields)
+                   for session in sessions],
+            nextPageToken=next_token,
+            summary=request.summary
         )
 
     @endpoints.method(
-        SPEAKER_GET_REQUEST,
+        SESSION_QUERY_POST_REQUEST,
+        SessionForms,
+        path='conference/{websafeConferenceKey}/querySessions',
+        http_method='POST',
+        name='querySessions')
+    def querySessions(self, request):
+        """querySessions -- Returns the sessions in a given conference matching any combination of filters."""
+        return self._querySessions(
+            ndb.Key(urlsafe=request.websafeConferenceKey),
+            self._formatSessionFilters(request.filters),
+            request, explain=request.explain)
+
+    @endpoints.method(
+        SPEAKER_SESSIONS_POST_REQUEST,
         SessionForms,
         path='getSessionsBySpeaker',
         http_method='POST',
@@ -1027,14 +2703,34 @@ class ConferenceApi(remote.Service):
 
         # query sessions by speaker name in the conference
         sessions = Session.query(
-            Session.speaker == request.speakerName).fetch()
+            Session.speaker == request.speakerName)
+        if request.summary:
+            # speaker has an equality filter, so it cannot be projected
+            sessions, next_token = self._fetchPage(
+                sessions, request, projection=[Session.sessionName])
+        else:
+            sessions, next_token = self._fetchPage(sessions, request)
         if not sessions:
-            raise endpoints.ForbiddenException(
-                "no sessions found.")
+            # a later page may come back empty even though the previous
+            # one reported more; that is just the end of the results
+            if not request.pageToken:
+                raise endpoints.ForbiddenException(
+                    "no sessions found.")
+            next_token = None
+
+        if request.summary:
+            items = [SessionForm(sessionName=session.sessionName,
+                                 speaker=request.speakerName)
+                     for session in sessions]
+        else:
+            items = [self._copySessionToForm(session)
+                     for session in sessions]
 
         # return set of SessionForm objects
         return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
+            items=items,
+            nextPageToken=next_token,
+            summary=request.summary
         )
 
     @endpoints.method(
@@ -1047,17 +2743,17 @@ class ConferenceApi(remote.Service):
         """getConferenceSessionsBySpeaker -- Returns all sessions from a given speaker at specific conference."""
 
         # query sessions by speaker name in the conference
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.speaker == request.speakerName).fetch()
-        if not sessions:
-            raise endpoints.ForbiddenException(
-                "no sessions found.")
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        forms = self._querySessions(c_key, [
+            self._sessionFilter('speaker', request.speakerName)], request)
+        if not forms.items:
+            # see getSessionsBySpeaker
+            if not request.pageToken:
+                raise endpoints.ForbiddenException(
+                    "no sessions found.")
+            forms.nextPageToken = None
 
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        return forms
 
     @endpoints.method(
         SESSION_TYPE_POST_REQUEST,
@@ -1068,14 +2764,10 @@ class ConferenceApi(remote.Service):
     def getConferenceSessionsByType(self, request):
         """getConferenceSessionsByType -- Returns all sessions in a given conference, given a specific type."""
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.typeOfSession == str(request.typeOfSession)).fetch()
-
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('typeOfSession', request.typeOfSession)],
+            request)
 
     @endpoints.method(
         SESSION_SPEAKER_ROLE_POST_REQUEST,
@@ -1086,14 +2778,9 @@ class ConferenceApi(remote.Service):
     def getConferenceSessionsBySpeakerRole(self, request):
         """getConferenceSessionsBySpeakerRole -- Returns all sessions in a given conference, given a specific type."""
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.role == str(request.speakerRole)).fetch()
-
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('role', request.speakerRole)], request)
 
     @endpoints.method(
         SESSION_LOCATION_POST_REQUEST,
@@ -1104,14 +2791,10 @@ class ConferenceApi(remote.Service):
     def getConferenceSessionsByLocation(self, request):
         """getConferenceSessionsByLocation -- Returns all sessions in a given conference, given a location."""
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.location == request.sessionLocation).fetch()
-
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('location', request.sessionLocation)],
+            request)
 
     @endpoints.method(
         SESSION_DATE_POST_REQUEST,
@@ -1122,13 +2805,9 @@ class ConferenceApi(remote.Service):
     def getConferenceSessionsByDate(self, request):
         """getConferenceSessionsByDate -- Returns all sessions in a given conference, provided a date."""
 
-        sessions = Session.query(ancestor=ndb.Key(urlsafe=request.websafeConferenceKey)).filter(
-            Session.date == datetime.strptime(str(request.sessionDate)[:10], "%Y-%m-%d").date()).fetch()
-
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('date', request.sessionDate)], request)
 
     @endpoints.method(
         SESSION_LOCATION_TYPE_POST_REQUEST,
@@ -1140,15 +2819,11 @@ class ConferenceApi(remote.Service):
         """getConferenceSessionsByLocationByType -- Return all sessions in a given conference, given a combination of \
          session type and location."""
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.location == request.sessionLocation).filter(
-            Session.typeOfSession == str(request.typeOfSession)).fetch()
-
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('location', request.sessionLocation),
+            self._sessionFilter('typeOfSession', request.typeOfSession)],
+            request)
 
     @endpoints.method(
         SESSION_LOCATION_TYPE_DATE_POST_REQUEST,
@@ -1160,34 +2835,74 @@ class ConferenceApi(remote.Service):
         """getConferenceSessionsByLocationByTypeByDate -- Returns all sessions in a given conference, given \
           a combination of session type, location and date."""
 
-        sessions = Session.query(ancestor=ndb.Key(
-            urlsafe=request.websafeConferenceKey)).filter(
-            Session.location == request.sessionLocation).filter(
-            Session.typeOfSession == str(request.typeOfSession)).filter(
-            Session.date == datetime.strptime(str(request.sessionDate)[:10], "%Y-%m-%d").date()).fetch()
+        c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        return self._querySessions(c_key, [
+            self._sessionFilter('location', request.sessionLocation),
+            self._sessionFilter('typeOfSession', request.typeOfSession),
+            self._sessionFilter('date', request.sessionDate)], request)
 
-        # return set of SessionForm objects
-        return SessionForms(
-            items=[self._copySessionToForm(session) for session in sessions]
-        )
-
-    @endpoints.method(message_types.VoidMessage, SessionForms,
+    @endpoints.method(SESSION_LIST_REQUEST, SessionForms,
         path='getSessionsNonWrkSpsBfr7PM',
         http_method='POST',
         name='getAllSessionsForNonWorksopsBefore7PM')
     def getAllSessionsForNonWorksopsBefore7PM(self, request):
         """getAllSessionsForNonWorksopsBefore7PM -- Returns all sessions \
-        for all non­workshop sessions before 7 pm."""
-
-        sessions = Session.query(ndb.AND(
-            Session.startTime !=  None,
-            Session.startTime < datetime.strptime('19:00'[:10], "%H:%M").time())
-        ).order(Session.startTime).fetch()
+        for all non­workshop sessions before 7 pm, optionally in one conference."""
+
+        # isWorkshop and startMinuteOfDay are precomputed on Session, so
+        # this is one equality and one inequality filter; the lower bound
+        # keeps out sessions without a startTime
+        ancestor = None
+        if request.websafeConferenceKey:
+            ancestor = ndb.Key(urlsafe=request.websafeConferenceKey)
+        keys = Session.query(ancestor=ancestor).filter(
+            Session.isWorkshop == False,
+            Session.startMinuteOfDay >= 0,
+            Session.startMinuteOfDay < EVENING_START_MINUTE
+        ).order(Session.startMinuteOfDay)
+        keys, next_token = self._fetchPage(keys, request, keys_only=True)
+        sessions = [session for session in ndb.get_multi(keys) if session]
 
         return SessionForms(
-            items=[(self._copySessionToForm(session)) for session in sessions if session.typeOfSession != 'Workshop']
+            items=[self._copySessionToForm(session) for session in sessions],
+            nextPageToken=next_token
         )
 
+    @staticmethod
+    def _backfillConferenceBuckets(cursor=None):
+        """Re-put one batch of conferences so their date buckets
+        (yearBuckets, monthBuckets, weekBuckets) are indexed, then chain a
+        task for the next batch; used by the conference buckets backfill
+        task.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        conferences, next_cursor, more = Conference.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+        ndb.put_multi(conferences)
+        logging.info('backfilled %d conferences' % len(conferences))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/backfill_conference_buckets')
+        return len(conferences)
+
+    @staticmethod
+    def _backfillSessionFlags(cursor=None):
+        """Re-put one batch of sessions so their computed properties
+        (isWorkshop, startMinuteOfDay) are indexed, then chain a task for
+        the next batch; used by the session flags backfill task.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        sessions, next_cursor, more = Session.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+        ndb.put_multi(sessions)
+        logging.info('backfilled %d sessions' % len(sessions))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/backfill_session_flags')
+        return len(sessions)
+
 
     @endpoints.method(SESSION_WISHLIST_REQUEST, BooleanMessage,
                       path='conference/{websafeConferenceKey}/sessionWishlist',
@@ -1215,16 +2930,13 @@ class ConferenceApi(remote.Service):
     def getSessionsInWishlist(self, request):
         """getSessionsInWishlist -- Returns all the sessions in a conference that the user is interested in."""
         prof = self._getProfileFromUser()  # get user Profile
+        sessions = self._getWishlistSessions(
+            prof, ndb.Key(urlsafe=request.websafeConferenceKey))
 
-        keys = prof.sessionWishList
-
+        # return set of SessionForm objects
         return SessionForms(
-            items=[
-                self._copySessionToForm(
-                    Session.query(
-                        ancestor=ndb.Key(
-                            urlsafe=request.websafeConferenceKey)) .filter(
-                        Session.key == key).get()) for key in keys])
+            items=[self._copySessionToForm(session) for session in sessions]
+        )
 
     @endpoints.method(message_types.VoidMessage, SessionForms,
                       path='getAllSessionsInWishlist',
@@ -1232,27 +2944,118 @@ class ConferenceApi(remote.Service):
     def getAllSessionsInWishlist(self, request=None):
         """getAllSessionsInWishlist -- Queries for all the sessions accross all conferences that the user is interested in."""
         prof = self._getProfileFromUser()  # get user Profile
+        sessions = self._getWishlistSessions(prof)
 
-        keys = prof.sessionWishList
-
+        # return set of SessionForm objects
         return SessionForms(
-            items=[
-                self._copySessionToForm(
-                    Session.query(
-                        Session.key == key).get()) for key in keys])
+            items=[self._copySessionToForm(session) for session in sessions]
+        )
+
+    @staticmethod
+    def _sessionInterval(session):
+        """Return the (start, end) datetimes of session, or None when its
+        date or startTime is unknown."""
+        if not session.date or not session.startTime:
+            return None
+        start = datetime.combine(session.date, session.startTime)
+        return start, start + timedelta(minutes=session.duration or 0)
+
+    @staticmethod
+    def _overlaps(interval, other):
+        """Return whether two (start, end) intervals overlap; sessions
+        ending when the other starts do not."""
+        return (interval is not None and other is not None and
+                interval[0] < other[1] and other[0] < interval[1])
+
+    @staticmethod
+    def _findConflicts(sessions):
+        """Return the (earlier, later) pairs of overlapping sessions.
+
+        Sweeps the sessions by start time, keeping a heap of the end
+        times of those still running, so it takes O(n log n) plus the
+        number of conflicts. Sessions without a date or startTime are
+        ignored.
+        """
+        intervals = []
+        for session in sessions:
+            interval = ConferenceApi._sessionInterval(session)
+            if interval:
+                intervals.append((interval, session))
+        intervals.sort(key=lambda item: item[0])
+
+        conflicts = []
+        running = []  # (end, index into intervals)
+        for index, ((start, end), session) in enumerate(intervals):
+            while running and running[0][0] <= start:
+                heapq.heappop(running)
+            for _, other in running:
+                conflicts.append((intervals[other][1], session))
+            heapq.heappush(running, (end, index))
+        return conflicts
+
+    @endpoints.method(SESSION_CONFERENCE_GET_WISHLIST_REQUEST,
+                      SessionConflictForms,
+                      path='getWishlistConflicts',
+                      http_method='GET', name='getWishlistConflicts')
+    def getWishlistConflicts(self, request):
+        """getWishlistConflicts -- Returns the pairs of overlapping sessions in the user's wishlist, of a given conference if websafeConferenceKey is passed."""
+        prof = self._getProfileFromUser()  # get user Profile
+        c_key = None
+        if request.websafeConferenceKey:
+            c_key = ndb.Key(urlsafe=request.websafeConferenceKey)
+        sessions = self._getWishlistSessions(prof, c_key)
+
+        return SessionConflictForms(
+            items=[SessionConflictForm(
+                session=self._copySessionToForm(session),
+                conflictsWith=self._copySessionToForm(other))
+                for session, other in self._findConflicts(sessions)]
+        )
 
     @endpoints.method(
-        SPEAKER_GET_REQUEST, SpeakerForms,
+        SPEAKER_LIST_REQUEST, SpeakerForms,
         path='getAllSpeakers', http_method='GET',
         name='getAllSpeakers')
-    def getAllSpeakers(self, request=None):
+    def getAllSpeakers(self, request):
         """getAllSpeakers - returns all speakers across all conferences and sessions."""
-        speakers = Speaker.query().fetch()
-
-        return SpeakerForms(items=[SpeakerForm(
-            speaker=speaker.name,
-            sessionNames=[Session.query(Session.key == key).get().sessionName for key in speaker.session_keys]
-        )for speaker in speakers])
+        # session names are denormalized on Speaker, so one query suffices
+        speakers, next_token = self._fetchPage(
+            Speaker.query().order(Speaker.name), request)
 
+        return SpeakerForms(
+            items=[self._copySpeakerToForm(speaker) for speaker in speakers],
+            nextPageToken=next_token
+        )
 
-api = endpoints.api_server([ConferenceApi])  # register API
+    @staticmethod
+    def _backfillSpeakerSessions(cursor=None):
+        """Fill in Speaker session_names/conference_keys for one batch of
+        speakers, then chain a task for the next batch; used by the
+        speaker backfill task.
+        """
+        start_cursor = Cursor(urlsafe=cursor) if cursor else None
+        speakers, next_cursor, more = Speaker.query().fetch_page(
+            BACKFILL_BATCH_SIZE, start_cursor=start_cursor)
+
+        for speaker in speakers:
+            sessions = ndb.get_multi(speaker.session_keys)
+            # drop keys of sessions that no longer exist
+            sessions = [session for session in sessions if session]
+            speaker.session_keys = [session.key for session in sessions]
+            speaker.session_names = [
+                session.sessionName for session in sessions]
+            speaker.conference_keys = []
+            for session in sessions:
+                if session.key.parent() not in speaker.conference_keys:
+                    speaker.conference_keys.append(session.key.parent())
+        ndb.put_multi(speakers)
+        logging.info('backfilled %d speakers' % len(speakers))
+
+        if more and next_cursor:
+            taskqueue.add(params={'cursor': next_cursor.urlsafe()},
+                          url='/tasks/backfill_speaker_sessions')
+        return len(speakers)
+
+
+api = clearRequestContext(
+    endpoints.api_server([ConferenceApi]))  # register API
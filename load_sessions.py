@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""
+load_sessions.py -- Udacity conference bulk session loader
+
+Creates the sessions listed in a JSON Lines or CSV file in a conference,
+through the remote API of a deployed (or local) Conference Central app:
+
+    load_sessions.py --host localhost:8080 <websafeConferenceKey> sessions.csv
+
+Each line/row holds one session, using the SessionForm field names
+(sessionName, speaker, typeOfSession, role, location, date, startTime,
+duration, highlights). Run it with the App Engine SDK on the PYTHONPATH.
+
+"""
+
+__author__ = 'ducalixte+api@google.com (Stanley Calixte)'
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from google.appengine.ext.remote_api import remote_api_stub
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def readSessions(path):
+    """Return the sessions in a .csv or JSON Lines file as a list of dicts."""
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Bulk load sessions into a conference.')
+    parser.add_argument('websafeConferenceKey')
+    parser.add_argument('path', help='.csv or JSON Lines (.jsonl) file')
+    parser.add_argument('--host', default='localhost:8080',
+                        help='app hostname (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='sessions per import batch '
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    remote_api_stub.ConfigureRemoteApiForOAuth(
+        args.host, '/_ah/remote_api',
+        secure=not args.host.startswith('localhost'))
+    # imported once the remote API stubs are in place
+    import endpoints
+    from google.appengine.ext import ndb
+    from conference import ConferenceApi
+
+    c_key = ndb.Key(urlsafe=args.websafeConferenceKey)
+    rows = readSessions(args.path)
+    # check the whole file before the first batch is written
+    for line, row in enumerate(rows, 1):
+        try:
+            ConferenceApi._importRowData(row)
+        except endpoints.BadRequestException as e:
+            print('row %d: %s' % (line, e))
+            return 1
+
+    start = time.time()
+    imported = skipped = 0
+    for index in range(0, len(rows), args.batch_size):
+        last = index + args.batch_size >= len(rows)
+        names, skipped_names = ConferenceApi._importSessions(
+            c_key, rows[index:index + args.batch_size], announce=last)
+        imported += len(names)
+        skipped += len(skipped_names)
+    elapsed = time.time() - start
+
+    print('imported %d sessions, skipped %d, in %.1fs (%.1f sessions/s)' % (
+        imported, skipped, elapsed, imported / elapsed if elapsed else 0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,7 +15,9 @@ __author__ = 'ducalixte+api@google.com (Stanley Calixte)'
 import webapp2
 from google.appengine.api import app_identity
 from google.appengine.api import mail
+from google.appengine.ext import ndb
 from conference import ConferenceApi
+from models import Conference
 
 
 class SetAnnouncementHandler(webapp2.RequestHandler):
@@ -30,11 +32,96 @@ class SetFeaturedSpeakerHandler(webapp2.RequestHandler):
 
     def post(self):
         """Set Featured Speaker in Memcache."""
-        ConferenceApi._cacheFeaturedSpeakerAnnouncement(
-            self.request.get('speaker'), self.request.get('conferenceKey')
+        ConferenceApi._setFeaturedSpeakers(
+            self.request.get('conferenceKey'), self.request.get('speaker'),
+            bool(self.request.get('allSpeakers'))
         )
 
 
+class SyncSeatsAvailableHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Copy the seat shard total onto Conference.seatsAvailable."""
+        ConferenceApi._syncSeatsAvailable(
+            self.request.get('websafeConferenceKey'))
+        self.response.set_status(204)
+
+
+class BackfillSpeakerSessionsHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Denormalize session names onto Speakers, one batch per task."""
+        ConferenceApi._backfillSpeakerSessions(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class BackfillSessionFlagsHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Re-put Sessions so their computed flags are indexed."""
+        ConferenceApi._backfillSessionFlags(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class BackfillConferenceBucketsHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Re-put Conferences so their date buckets are indexed."""
+        ConferenceApi._backfillConferenceBuckets(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class BackfillSessionNameIndexHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Add SessionNameIndex entries for existing Sessions."""
+        ConferenceApi._backfillSessionNameIndex(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class MergeSpeakersHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Merge Speakers into name-keyed entities."""
+        ConferenceApi._mergeSpeakers(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class BackfillSearchIndexHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Write search postings for existing Conferences and Sessions."""
+        ConferenceApi._backfillSearchIndex(
+            self.request.get('kind') or 'Conference',
+            self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class MigrateProfileListsHandler(webapp2.RequestHandler):
+
+    def post(self):
+        """Move Profile registrations/wishlists into child entities."""
+        ConferenceApi._migrateProfiles(self.request.get('cursor'))
+        self.response.set_status(204)
+
+
+class ExportConferenceHandler(webapp2.RequestHandler):
+
+    def get(self):
+        """Export a conference as newline-delimited JSON."""
+        try:
+            conf = ndb.Key(urlsafe=self.request.get(
+                'websafeConferenceKey')).get()
+        except Exception:
+            conf = None
+        if not isinstance(conf, Conference):
+            self.abort(404)
+
+        self.response.content_type = 'application/x-ndjson'
+        for line in ConferenceApi()._exportConference(conf):
+            self.response.write(line)
+
+
 class SendConfirmationEmailHandler(webapp2.RequestHandler):
 
     def post(self):
@@ -54,4 +141,13 @@ app = webapp2.WSGIApplication([
     ('/crons/set_announcement', SetAnnouncementHandler),
     ('/tasks/send_confirmation_email', SendConfirmationEmailHandler),
     ('/tasks/set_featured_speaker', SetFeaturedSpeakerHandler),
+    ('/tasks/backfill_speaker_sessions', BackfillSpeakerSessionsHandler),
+    ('/tasks/sync_seats_available', SyncSeatsAvailableHandler),
+    ('/tasks/backfill_session_flags', BackfillSessionFlagsHandler),
+    ('/tasks/migrate_profile_lists', MigrateProfileListsHandler),
+    ('/tasks/backfill_session_name_index', BackfillSessionNameIndexHandler),
+    ('/tasks/merge_speakers', MergeSpeakersHandler),
+    ('/tasks/backfill_search_index', BackfillSearchIndexHandler),
+    ('/tasks/backfill_conference_buckets', BackfillConferenceBucketsHandler),
+    ('/exports/conference', ExportConferenceHandler),
 ], debug=True)
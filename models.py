@@ -13,6 +13,8 @@ created/forked from conferences.py by wesc on 2014 may 24
 __author__ = 'wesc+api@google.com (Stanley Calixte)'
 
 import httplib
+from datetime import timedelta
+
 import endpoints
 from protorpc import messages
 from google.appengine.ext import ndb
@@ -28,10 +30,24 @@ class Profile(ndb.Model):
     displayName = ndb.StringProperty()
     mainEmail = ndb.StringProperty()
     teeShirtSize = ndb.StringProperty(default='NOT_SPECIFIED')
+    # legacy lists, superseded by Registration and WishlistEntry children
     conferenceKeysToAttend = ndb.StringProperty(repeated=True)
     sessionWishList = ndb.KeyProperty(repeated=True)
 
 
+class Registration(ndb.Model):
+    """Registration -- Conference a Profile is registered for; child of the
+    Profile keyed by the websafe Conference key"""
+    conference = ndb.KeyProperty(required=True)
+
+
+class WishlistEntry(ndb.Model):
+    """WishlistEntry -- Session in a Profile's wishlist; child of the
+    Profile keyed by the websafe Session key"""
+    session = ndb.KeyProperty(required=True)
+    conference = ndb.KeyProperty(required=True)
+
+
 class ProfileMiniForm(messages.Message):
     """ProfileMiniForm -- update Profile form message"""
     displayName = messages.StringField(1)
@@ -51,11 +67,68 @@ class StringMessage(messages.Message):
     data = messages.StringField(1, required=True)
 
 
+class AnnouncementConferenceForm(messages.Message):
+    """AnnouncementConferenceForm -- nearly sold out Conference outbound
+    form message"""
+    websafeConferenceKey = messages.StringField(1)
+    name = messages.StringField(2)
+
+
+class AnnouncementForm(messages.Message):
+    """AnnouncementForm -- Announcement outbound form message; only etag
+    and unchanged are set when the client's copy is current"""
+    data = messages.StringField(1)
+    conferences = messages.MessageField(
+        AnnouncementConferenceForm, 2, repeated=True)
+    version = messages.IntegerField(3)
+    generatedAt = messages.StringField(4)
+    etag = messages.StringField(5)
+    unchanged = messages.BooleanField(6)
+    truncated = messages.BooleanField(7)
+    totalConferences = messages.IntegerField(
+        8, variant=messages.Variant.INT32)
+
+
 class BooleanMessage(messages.Message):
     """BooleanMessage-- outbound Boolean value message"""
     data = messages.BooleanField(1)
 
 
+def calendarYearBuckets(start, end=None):
+    """Return the 'YYYY' years from start to end, both included."""
+    if not start:
+        return []
+    end = max(end or start, start)
+    return ['%04d' % year for year in range(start.year, end.year + 1)]
+
+
+def yearMonthBuckets(start, end=None):
+    """Return the 'YYYY-MM' months from start to end, both included."""
+    if not start:
+        return []
+    end = max(end or start, start)
+    buckets = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        buckets.append('%04d-%02d' % (year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return buckets
+
+
+def isoWeekBuckets(start, end=None):
+    """Return the 'YYYY-Www' ISO weeks from start to end, both included."""
+    if not start:
+        return []
+    end = max(end or start, start)
+    buckets = []
+    monday = start - timedelta(days=start.weekday())
+    while monday <= end:
+        year, week, _ = monday.isocalendar()
+        buckets.append('%04d-W%02d' % (year, week))
+        monday += timedelta(days=7)
+    return buckets
+
+
 class Conference(ndb.Model):
     """Conference -- Conference object"""
     name = ndb.StringProperty(required=True)
@@ -68,6 +141,43 @@ class Conference(ndb.Model):
     endDate = ndb.DateProperty()
     maxAttendees = ndb.IntegerProperty()
     seatsAvailable = ndb.IntegerProperty()
+    # SeatShards the seats were split across; unset for conferences that
+    # predate it, which use SEAT_SHARD_COUNT
+    seatShardCount = ndb.IntegerProperty(indexed=False)
+    # years, months and weeks the conference spans, precomputed on put so
+    # that a date range overlap is an equality filter
+    yearBuckets = ndb.ComputedProperty(
+        lambda self: calendarYearBuckets(self.startDate, self.endDate),
+        repeated=True)
+    monthBuckets = ndb.ComputedProperty(
+        lambda self: yearMonthBuckets(self.startDate, self.endDate),
+        repeated=True)
+    weekBuckets = ndb.ComputedProperty(
+        lambda self: isoWeekBuckets(self.startDate, self.endDate),
+        repeated=True)
+
+
+class NearlySoldOut(ndb.Model):
+    """NearlySoldOut -- single entity listing the conferences with only a
+    few seats left, as {websafe Conference key: name}"""
+    conferences = ndb.JsonProperty(default={})
+    # bumped on every change of conferences
+    version = ndb.IntegerProperty(default=0, indexed=False)
+    generatedAt = ndb.DateTimeProperty(auto_now=True, indexed=False)
+
+
+class SeatShard(ndb.Model):
+    """SeatShard -- one slice of the seats available for a Conference"""
+    seatsAvailable = ndb.IntegerProperty(default=0, indexed=False)
+
+
+class SearchPosting(ndb.Model):
+    """SearchPosting -- search token of a Conference or Session; child of
+    the entity, keyed by the token"""
+    kind = ndb.StringProperty(required=True)
+    token = ndb.StringProperty(required=True)
+    # occurrences of token in the entity, weighted by field
+    weight = ndb.IntegerProperty(default=1, indexed=False)
 
 
 class ConferenceForm(messages.Message):
@@ -89,6 +199,9 @@ class ConferenceForm(messages.Message):
 class ConferenceForms(messages.Message):
     """ConferenceForms -- multiple Conference outbound form message"""
     items = messages.MessageField(ConferenceForm, 1, repeated=True)
+    nextPageToken = messages.StringField(2)
+    # items only carry name and websafeConferenceKey
+    summary = messages.BooleanField(3)
 
 
 class TeeShirtSize(messages.Enum):
@@ -120,18 +233,50 @@ class ConferenceQueryForm(messages.Message):
 class ConferenceQueryForms(messages.Message):
     """ConferenceQueryForms -- multiple ConferenceQueryForm inbound form message"""
     filters = messages.MessageField(ConferenceQueryForm, 1, repeated=True)
+    pageSize = messages.IntegerField(2, variant=messages.Variant.INT32)
+    pageToken = messages.StringField(3)
+    summary = messages.BooleanField(4)
 
 
 class Speaker(ndb.Model):
     """Speaker -- Speaker Object"""
     name = ndb.StringProperty(required=True)
     session_keys = ndb.KeyProperty(repeated=True)
+    # denormalized from the sessions in session_keys, same order
+    session_names = ndb.StringProperty(repeated=True, indexed=False)
+    conference_keys = ndb.KeyProperty(repeated=True)
+
+
+class FeaturedSpeaker(ndb.Model):
+    """FeaturedSpeaker -- featured speaker of a Conference, keyed by the
+    websafe Conference key; backs the memcache entry"""
+    speaker = ndb.StringProperty(indexed=False)
+    sessionNames = ndb.StringProperty(repeated=True, indexed=False)
+    # number of sessions per speaker name in the conference
+    sessionCounts = ndb.JsonProperty(default={})
+
+
+class FeaturedSpeakerForm(messages.Message):
+    """FeaturedSpeakerForm -- featured speaker of a Conference outbound
+    form message"""
+    websafeConferenceKey = messages.StringField(1)
+    speaker = messages.StringField(2)
+    sessionNames = messages.StringField(3, repeated=True)
+
+
+class FeaturedSpeakerForms(messages.Message):
+    """FeaturedSpeakerForms -- multiple FeaturedSpeakerForm outbound form
+    message"""
+    items = messages.MessageField(FeaturedSpeakerForm, 1, repeated=True)
 
 
 class AddSpeakerForm(messages.Message):
     """SpeakerForm -- Speaker outbound form message"""
     speaker = messages.StringField(1)
     sessionName = messages.StringField(2)
+    # conference of the session, looked up by name across all conferences
+    # when missing
+    websafeConferenceKey = messages.StringField(3)
 
 
 class SpeakerForm(messages.Message):
@@ -143,6 +288,7 @@ class SpeakerForm(messages.Message):
 class SpeakerForms(messages.Message):
     """SpeakerForms -- multiple Conference outbound form message"""
     items = messages.MessageField(SpeakerForm, 1, repeated=True)
+    nextPageToken = messages.StringField(2)
 
 
 class SpeakerQueryForm(messages.Message):
@@ -155,6 +301,8 @@ class SpeakerQueryForm(messages.Message):
 class SpeakerQueryForms(messages.Message):
     """SpeakerQueryForms -- multiple SpeakerQueryForm inbound form message"""
     filters = messages.MessageField(SpeakerQueryForm, 1, repeated=True)
+    pageSize = messages.IntegerField(2, variant=messages.Variant.INT32)
+    pageToken = messages.StringField(3)
 
 
 class Session(ndb.Model):
@@ -169,6 +317,19 @@ class Session(ndb.Model):
     date = ndb.DateProperty(auto_now=False)
     startTime = ndb.TimeProperty()
     duration = ndb.IntegerProperty(default=50)
+    # precomputed on put so that queries mixing session type and start
+    # time need a single inequality filter
+    isWorkshop = ndb.ComputedProperty(
+        lambda self: self.typeOfSession == 'Workshop')
+    startMinuteOfDay = ndb.ComputedProperty(
+        lambda self: self.startTime.hour * 60 + self.startTime.minute
+        if self.startTime else None)
+
+
+class SessionNameIndex(ndb.Model):
+    """SessionNameIndex -- Session of a Conference by name; child of the
+    Conference keyed by the normalized session name"""
+    session = ndb.KeyProperty(required=True, indexed=False)
 
 
 class SessionForm(messages.Message):
@@ -186,6 +347,35 @@ class SessionForm(messages.Message):
 class SessionForms(messages.Message):
     """SessionForms -- multiple Sessions outbound form message"""
     items = messages.MessageField(SessionForm, 1, repeated=True)
+    nextPageToken = messages.StringField(2)
+    queryPlan = messages.StringField(3)
+    rowsScanned = messages.IntegerField(4, variant=messages.Variant.INT32)
+    # items only carry sessionName and speaker
+    summary = messages.BooleanField(5)
+
+
+class SessionConflictForm(messages.Message):
+    """SessionConflictForm -- pair of overlapping Sessions outbound form
+    message"""
+    session = messages.MessageField(SessionForm, 1)
+    conflictsWith = messages.MessageField(SessionForm, 2)
+
+
+class SessionConflictForms(messages.Message):
+    """SessionConflictForms -- multiple SessionConflictForm outbound form
+    message"""
+    items = messages.MessageField(SessionConflictForm, 1, repeated=True)
+
+
+class SessionImportForms(messages.Message):
+    """SessionImportForms -- batch of Sessions inbound form message"""
+    items = messages.MessageField(SessionForm, 1, repeated=True)
+
+
+class SessionImportResultForm(messages.Message):
+    """SessionImportResultForm -- outcome of a Session import"""
+    imported = messages.IntegerField(1, variant=messages.Variant.INT32)
+    skipped = messages.StringField(2, repeated=True)
 
 
 class SessionType(messages.Enum):
@@ -221,7 +411,7 @@ class SessionLocationTypeOfSessionDateQueryForm(messages.Message):
 
 class SessionLocationTypeOfSessionQueryForm(messages.Message):
     """SessionLocationTypeOfSessionQueryForm -- Find sessions by location, type of session and date by query inbound form message"""
-    sessionLocationc = messages.StringField(1, required=True)
+    sessionLocation = messages.StringField(1, required=True)
     typeOfSession = messages.EnumField('SessionType', 2, required=True)
 
 
@@ -254,6 +444,8 @@ class QuerySessionsToWishlistForm(messages.Message):
     """SessionWishListQueryForm -- Session Speaker query inbound form message"""
     session = messages.StringField(1, required=True)
     speaker = messages.StringField(2)
+    # refuse to add a session overlapping one already in the wishlist
+    checkConflicts = messages.BooleanField(3)
 
 
 class SessionWishListForm(messages.Message):
@@ -262,12 +454,16 @@ class SessionWishListForm(messages.Message):
 
 
 class SessionQueryForm(messages.Message):
-    """SessionQueryForm -- Speaker query inbound form message"""
+    """SessionQueryForm -- Session query inbound form message"""
     field = messages.StringField(1)
     operator = messages.StringField(2)
     value = messages.StringField(3)
 
 
 class SessionQueryForms(messages.Message):
-    """SessionQueryForms -- multiple SpeakerQueryForm inbound form message"""
+    """SessionQueryForms -- multiple SessionQueryForm inbound form message"""
     filters = messages.MessageField(SessionQueryForm, 1, repeated=True)
+    pageSize = messages.IntegerField(2, variant=messages.Variant.INT32)
+    pageToken = messages.StringField(3)
+    explain = messages.BooleanField(4)
+    summary = messages.BooleanField(5)
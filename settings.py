@@ -16,3 +16,22 @@ WEB_CLIENT_ID = '1010960586378-4br0bqvckb21v7tuv8riaj33a7ssfqoj.apps.googleuserc
 ANDROID_CLIENT_ID = 'replace with Android client ID'
 IOS_CLIENT_ID = 'replace with iOS client ID'
 ANDROID_AUDIENCE = WEB_CLIENT_ID
+
+# Seconds a cached ConferenceForm served by getConference stays in memcache.
+CONFERENCE_CACHE_TTL = 600
+
+# Number of SeatShard entities a conference's available seats are split
+# across; registrations touch one shard each. Keep it below 23 so a
+# transaction can still reach every shard plus the Profile and Conference.
+SEAT_SHARD_COUNT = 20
+
+# Seconds the seat total summed over the shards stays in memcache, bounding
+# how long a total read while a registration committed can be served.
+SEATS_CACHE_TTL = 60
+
+# Seconds between syncs of the shard total back to Conference.seatsAvailable.
+SEAT_SYNC_DELAY = 10
+
+# Seconds featured speaker updates for a conference are coalesced over
+# before a single task recomputes the featured speaker.
+FEATURED_SPEAKER_DELAY = 10
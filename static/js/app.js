@@ -75,6 +75,16 @@ app.constant('HTTP_ERRORS', {
     'UNAUTHORIZED': 401
 });
 
+/**
+ * @ngdoc constant
+ * @name ANNOUNCEMENT_POLL_INTERVAL
+ *
+ * @description
+ * Milliseconds between two polls of the announcement.
+ *
+ */
+app.constant('ANNOUNCEMENT_POLL_INTERVAL', 60000);
+
 
 /**
  * @ngdoc service
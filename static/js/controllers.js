@@ -691,7 +691,42 @@ conferenceApp.controllers.controller('ConferenceDetailCtrl', function ($scope, $
  * such as user authentications.
  *
  */
-conferenceApp.controllers.controller('RootCtrl', function ($scope, $location, oauth2Provider) {
+conferenceApp.controllers.controller('RootCtrl', function ($scope, $location, $interval, oauth2Provider,
+                                                          ANNOUNCEMENT_POLL_INTERVAL) {
+
+    /**
+     * The nearly sold out conferences announcement, refreshed by pollAnnouncement.
+     * @type {string}
+     */
+    $scope.announcement = '';
+
+    /**
+     * The etag of the announcement shown, sent back so that unchanged announcements are not resent.
+     * @type {string}
+     */
+    var announcementEtag = null;
+
+    /**
+     * Invokes the conference.getAnnouncement API, passing the etag of the current announcement.
+     */
+    $scope.pollAnnouncement = function () {
+        if (!gapi.client.conference) {
+            // The conference API is still loading; try again on the next poll.
+            return;
+        }
+        var params = announcementEtag ? {ifNoneMatch: announcementEtag} : {};
+        gapi.client.conference.getAnnouncement(params).execute(function (resp) {
+            if (resp.error || resp.result.unchanged) {
+                return;
+            }
+            $scope.$apply(function () {
+                announcementEtag = resp.result.etag;
+                $scope.announcement = resp.result.data || '';
+            });
+        });
+    };
+    $scope.pollAnnouncement();
+    $interval($scope.pollAnnouncement, ANNOUNCEMENT_POLL_INTERVAL);
 
     /**
      * Returns if the viewLocation is the currently viewed page.
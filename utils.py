@@ -1,11 +1,181 @@
+import collections
+import hashlib
 import json
 import os
+import random
+import threading
 import time
 import uuid
 
+from google.appengine.api import apiproxy_stub_map
+from google.appengine.api import memcache
 from google.appengine.api import urlfetch
 from models import Profile
 
+TOKENINFO_URL = 'https://www.googleapis.com/oauth2/v1/tokeninfo?%s=%s'
+MEMCACHE_TOKEN_KEY = 'TOKEN:%s'
+TOKEN_CACHE_SIZE = 1000
+TOKENINFO_RETRIES = 3
+TOKENINFO_BACKOFF = 0.1  # seconds, doubled after each failed attempt
+TOKENINFO_DEADLINE = 5  # seconds
+
+
+class LRUCache(object):
+    """LRUCache -- small thread-safe in-process cache with per-entry expiry"""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] <= time.time():
+                return None
+            # re-insert as most recently used
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, value, expires_at):
+        """Cache value for key until the expires_at timestamp."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class RequestContext(object):
+    """RequestContext -- state shared by the helpers serving one request
+
+    Holds the resolved user, user_id and Profile so they are looked up
+    once, and counts the datastore RPCs (by call name, e.g. 'Get', 'Put',
+    'RunQuery') made on this thread while the context is active.
+    """
+
+    _active = threading.local()
+
+    def __init__(self):
+        self.user = None
+        self.user_id = None
+        self.profile = None
+        self.rpcs = collections.Counter()
+
+    def activate(self):
+        """Make this the context datastore RPCs are counted against."""
+        RequestContext._active.context = self
+        return self
+
+    @staticmethod
+    def deactivate():
+        """Stop counting datastore RPCs on this thread against any
+        context, e.g. once its request finished."""
+        RequestContext._active.context = None
+
+    @property
+    def gets(self):
+        return self.rpcs['Get']
+
+    @property
+    def puts(self):
+        return self.rpcs['Put']
+
+    @staticmethod
+    def countRpc(service, call, request, response):
+        """apiproxy pre-call hook counting datastore RPCs."""
+        context = getattr(RequestContext._active, 'context', None)
+        if context is not None:
+            context.rpcs[call] += 1
+
+
+apiproxy_stub_map.apiproxy.GetPreCallHooks().Append(
+    'request_context_rpc_counter', RequestContext.countRpc, 'datastore_v3')
+
+
+def clearRequestContext(app):
+    """Wrap WSGI app so the RequestContext activated while serving a
+    request is cleared when it finishes, and later requests (including
+    task handlers) on the same thread are not counted against it."""
+    def wrapper(environ, start_response):
+        try:
+            return app(environ, start_response)
+        finally:
+            RequestContext.deactivate()
+    return wrapper
+
+
+def urlfetchTokenInfo(token_type, token):
+    """Default tokeninfo fetcher; returns (status_code, content)."""
+    resp = urlfetch.fetch(TOKENINFO_URL % (token_type, token),
+                          deadline=TOKENINFO_DEADLINE)
+    return resp.status_code, resp.content
+
+
+_token_cache = LRUCache(TOKEN_CACHE_SIZE)
+_tokeninfo_fetcher = urlfetchTokenInfo
+
+
+def setTokenInfoFetcher(fetcher):
+    """Replace the tokeninfo fetcher, e.g. with one hitting a local stub.
+
+    fetcher(token_type, token) must return (status_code, content); pass
+    None to restore the urlfetch based default.
+    """
+    global _tokeninfo_fetcher
+    _tokeninfo_fetcher = fetcher or urlfetchTokenInfo
+
+
+def _fetchTokenInfo(token):
+    """Ask the tokeninfo endpoint about token, retrying with a short
+    jittered backoff; returns the decoded response or {}.
+    """
+    token_type = 'id_token'
+    if 'OAUTH_USER_ID' in os.environ:
+        token_type = 'access_token'
+    backoff = TOKENINFO_BACKOFF
+    for attempt in range(TOKENINFO_RETRIES):
+        status_code, content = _tokeninfo_fetcher(token_type, token)
+        if status_code == 200:
+            return json.loads(content)
+        elif status_code == 400 and 'invalid_token' in content:
+            # retry straight away as an access token
+            token_type = 'access_token'
+        elif attempt + 1 < TOKENINFO_RETRIES:
+            time.sleep(random.uniform(0, backoff))
+            backoff *= 2
+    return {}
+
+
+def getTokenUserId(token):
+    """Return the user_id a verified OAuth token belongs to.
+
+    Results are cached in process and in memcache until the token's
+    expires_in runs out, so tokeninfo is only called once per token.
+    """
+    token_hash = hashlib.sha256(token).hexdigest()
+    user_id = _token_cache.get(token_hash)
+    if user_id is not None:
+        return user_id
+
+    cached = memcache.get(MEMCACHE_TOKEN_KEY % token_hash)
+    if cached is not None:
+        user_id, expires_at = cached
+        _token_cache.set(token_hash, user_id, expires_at)
+        return user_id
+
+    info = _fetchTokenInfo(token)
+    user_id = info.get('user_id', '')
+    expires_in = int(info.get('expires_in', 0))
+    if user_id and expires_in > 0:
+        expires_at = time.time() + expires_in
+        _token_cache.set(token_hash, user_id, expires_at)
+        memcache.set(MEMCACHE_TOKEN_KEY % token_hash,
+                     (user_id, expires_at), time=expires_in)
+    return user_id
+
+
 def getUserId(user, id_type="email"):
     if id_type == "email":
         return user.email()
@@ -14,25 +184,7 @@ def getUserId(user, id_type="email"):
         """A workaround implementation for getting userid."""
         auth = os.getenv('HTTP_AUTHORIZATION')
         bearer, token = auth.split()
-        token_type = 'id_token'
-        if 'OAUTH_USER_ID' in os.environ:
-            token_type = 'access_token'
-        url = ('https://www.googleapis.com/oauth2/v1/tokeninfo?%s=%s'
-               % (token_type, token))
-        user = {}
-        wait = 1
-        for i in range(3):
-            resp = urlfetch.fetch(url)
-            if resp.status_code == 200:
-                user = json.loads(resp.content)
-                break
-            elif resp.status_code == 400 and 'invalid_token' in resp.content:
-                url = ('https://www.googleapis.com/oauth2/v1/tokeninfo?%s=%s'
-                       % ('access_token', token))
-            else:
-                time.sleep(wait)
-                wait = wait + i
-        return user.get('user_id', '')
+        return getTokenUserId(token)
 
     if id_type == "custom":
         # implement your own user_id creation and getting algorythm